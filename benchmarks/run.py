@@ -0,0 +1,216 @@
+"""
+Benchmarks of the file, rename, replacement and logging hot paths of pycomfort.
+
+Generates a synthetic tree and synthetic files of configurable size in a temporary folder, times every operation
+several times and writes the results as JSON, so runs of different versions can be compared:
+
+    python benchmarks/run.py --output results/main.json
+    python benchmarks/run.py --output results/branch.json --compare results/main.json
+"""
+import io
+import json
+import platform
+import random
+import statistics
+import string
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+import typer
+
+# benchmark the working tree this script belongs to, so that checkouts of different versions can be compared
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+EXTENSIONS = [".txt", ".md", ".py", ".json", ".csv"]
+
+
+def make_tree(root: Path, depth: int, fanout: int, files_per_dir: int, seed: int = 42) -> int:
+    """
+    Creates a tree of fanout folders per level, depth levels deep, with files_per_dir small files in every folder.
+    :return: number of created files
+    """
+    rng = random.Random(seed)
+    created = 0
+    level = [root]
+    for d in range(depth + 1):
+        next_level = []
+        for folder in level:
+            folder.mkdir(parents=True, exist_ok=True)
+            for i in range(files_per_dir):
+                (folder / f"file_{i}{rng.choice(EXTENSIONS)}").write_text(f"content {i}\n")
+                created += 1
+            if d < depth:
+                next_level.extend(folder / f"dir_{j}" for j in range(fanout))
+        level = next_level
+    return created
+
+
+def make_text(path: Path, size: int, needle: str, every: int, seed: int = 42) -> Path:
+    """Writes a text file of about size bytes of random words with needle inserted every `every` words"""
+    rng = random.Random(seed)
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 10))) for _ in range(1000)]
+    parts, written, count = [], 0, 0
+    while written < size:
+        word = needle if count % every == 0 else rng.choice(words)
+        parts.append(word)
+        written += len(word) + 1
+        count += 1
+        if count % 16 == 0:
+            parts.append("\n")
+    path.write_text(" ".join(parts))
+    return path
+
+
+def measure(fun: Callable[[], object], repeat: int, setup: Optional[Callable[[], object]] = None) -> dict:
+    """Runs fun repeat times (calling setup before every run, outside of the timing) and returns timing statistics"""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fun()
+        times.append(time.perf_counter() - start)
+    return {"best_s": min(times), "median_s": statistics.median(times), "runs": repeat}
+
+
+def run_benchmarks(workdir: Path, depth: int = 3, fanout: int = 5, files_per_dir: int = 20,
+                   file_size: int = 10_000_000, messages: int = 10_000, repeat: int = 5) -> dict:
+    """
+    Runs all benchmarks in workdir and returns their results together with the parameters and the environment.
+    :param workdir: empty folder to generate the data in
+    :param depth: depth of the synthetic tree
+    :param fanout: subfolders per folder
+    :param files_per_dir: files per folder
+    :param file_size: size in bytes of the file used by replacement benchmarks
+    :param messages: number of Eliot messages logged to measure the per-message cost of RenderingFileDestination
+    :param repeat: number of timed runs of every benchmark
+    """
+    from eliot import Logger, start_action
+    from pycomfort.files import (traverse, tprint, with_ext, rename_files_with_dictionary,
+                                 replace_in_file, replace_from_dict_in_file)
+    from pycomfort.logging import RenderingFileDestination
+
+    tree = workdir / "tree"
+    created = make_tree(tree, depth, fanout, files_per_dir)
+    results = {}
+    results["traverse"] = measure(lambda: traverse(tree), repeat)
+    results["traverse_workers"] = measure(lambda: traverse(tree, workers=4), repeat)
+    results["tprint"] = measure(lambda: redirect_print(lambda: tprint(tree)), repeat)
+    results["with_ext"] = measure(lambda: with_ext(tree, ".md").to_list(), repeat)
+
+    flat = tree / "dir_0"
+    forward, backward = {"file_": "renamed_"}, {"renamed_": "file_"}
+    state = {"renamed": False}
+
+    def rename():
+        rename_files_with_dictionary(flat, backward if state["renamed"] else forward)
+        state["renamed"] = not state["renamed"]
+    results["rename_files_with_dictionary"] = measure(rename, repeat)
+
+    text = make_text(workdir / "big.txt", file_size, "needle", every=1000)
+    original = text.read_bytes()
+
+    def restore():
+        text.write_bytes(original)
+    results["replace_in_file"] = measure(lambda: replace_in_file(text, "needle", "thread"), repeat, restore)
+    results["replace_in_file_binary"] = measure(lambda: replace_in_file(text, "needle", "thread", binary=True),
+                                                repeat, restore)
+    dictionary = {f"needle{i}" if i else "needle": f"thread{i}" for i in range(50)}
+    results["replace_from_dict_in_file"] = measure(lambda: replace_from_dict_in_file(text, dictionary), repeat, restore)
+    results["replace_from_dict_in_file_simultaneous"] = measure(
+        lambda: replace_from_dict_in_file(text, dictionary, mode="simultaneous"), repeat, restore)
+
+    with (workdir / "log.json").open("w") as json_file, (workdir / "log.txt").open("w") as rendered_file:
+        destination = RenderingFileDestination(json_file=json_file, rendered_file=rendered_file)
+        Logger._destinations.add(destination)
+        try:
+            def log():
+                for i in range(messages):
+                    with start_action(action_type="benchmark", index=i):
+                        pass
+            logged = measure(log, repeat)
+        finally:
+            Logger._destinations.remove(destination)
+            destination.assembler.flush()
+    # every action produces a start and an end message
+    logged["per_message_us"] = logged["best_s"] / (messages * 2) * 1e6
+    results["rendering_file_destination"] = logged
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "version": pycomfort_version(),
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "parameters": {"depth": depth, "fanout": fanout, "files_per_dir": files_per_dir, "files": created,
+                       "file_size": file_size, "messages": messages, "repeat": repeat},
+        "results": results,
+    }
+
+
+def redirect_print(fun: Callable[[], object]):
+    with redirect_stdout(io.StringIO()):
+        fun()
+
+
+def pycomfort_version() -> str:
+    from importlib.metadata import version, PackageNotFoundError
+    try:
+        return version("pycomfort")
+    except PackageNotFoundError:
+        return "dev"
+
+
+def git_commit() -> Optional[str]:
+    import subprocess
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, previous: dict) -> list[str]:
+    """Lines with the ratio of current to previous best times of every benchmark present in both"""
+    lines = []
+    for name, result in current["results"].items():
+        before = previous["results"].get(name)
+        if before is None:
+            continue
+        ratio = result["best_s"] / before["best_s"] if before["best_s"] else float("inf")
+        lines.append(f"{name:45} {before['best_s']:10.4f}s -> {result['best_s']:10.4f}s  x{ratio:.2f}")
+    return lines
+
+
+def main(
+    output: Optional[Path] = typer.Option(None, help="JSON file to write the results to"),
+    compare_with: Optional[Path] = typer.Option(None, "--compare", exists=True, help="previous results to compare with"),
+    depth: int = typer.Option(3, help="depth of the synthetic tree"),
+    fanout: int = typer.Option(5, help="subfolders per folder"),
+    files_per_dir: int = typer.Option(20, help="files per folder"),
+    file_size: int = typer.Option(10_000_000, help="size in bytes of the file used by replacement benchmarks"),
+    messages: int = typer.Option(10_000, help="Eliot actions logged to measure RenderingFileDestination"),
+    repeat: int = typer.Option(5, help="timed runs of every benchmark")
+):
+    """Run the benchmarks and print (and optionally save and compare) the results"""
+    with tempfile.TemporaryDirectory(prefix="pycomfort_bench_") as workdir:
+        report = run_benchmarks(Path(workdir), depth, fanout, files_per_dir, file_size, messages, repeat)
+    for name, result in report["results"].items():
+        print(f"{name:45} best {result['best_s']:10.4f}s  median {result['median_s']:10.4f}s")
+    print(f"rendering_file_destination per message: {report['results']['rendering_file_destination']['per_message_us']:.1f} us")
+    if output is not None:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2))
+    if compare_with is not None:
+        print(f"compared with {compare_with}:")
+        for line in compare(report, json.loads(compare_with.read_text())):
+            print(line)
+
+
+if __name__ == "__main__":
+    typer.run(main)
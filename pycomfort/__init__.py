@@ -0,0 +1,15 @@
+import importlib
+
+# submodules are imported on first attribute access (pycomfort.files, pycomfort.logging, ...),
+# so "import pycomfort" does not pull in eliot, typer or pyfunctional
+_SUBMODULES = {"afiles", "comfort", "config", "files", "index", "levels", "logging", "logs", "manifest", "progress", "renames", "replacements", "rotation", "timing"}
+
+
+def __getattr__(name: str):
+    if name in _SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | _SUBMODULES)
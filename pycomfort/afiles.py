@@ -0,0 +1,208 @@
+"""
+Asyncio counterparts of the helpers in pycomfort.files.
+
+Blocking work runs on a bounded thread pool, so the event loop stays responsive while trees are walked and files
+are rewritten. Directory walks are async generators that list one directory per executor job, so they can be
+stopped (or cancelled) between directories. Batch operations run at most `limit` files at a time; when the awaiting
+task is cancelled no new files are started and the cancellation propagates as soon as the running ones finish.
+A file that is being rewritten is never left half written: in-place edits complete (or fail) as a whole.
+"""
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Union, Optional, Callable, AsyncIterator, Iterable, TypeVar
+
+from pycomfort import files
+from pycomfort.files import ScannedDir, _list_dir
+from pycomfort.replacements import CompiledDictionary, RegexDictionary, ReplaceMode, compile_dictionary
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Shared bounded thread pool of the async helpers, created on first use with min(8, cpu_count) threads"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1), thread_name_prefix="pycomfort-io")
+        return _executor
+
+
+def set_executor_workers(workers: int):
+    """Replaces the shared thread pool with one of the given size, jobs already running on the old one finish"""
+    global _executor
+    with _executor_lock:
+        old, _executor = _executor, ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pycomfort-io")
+    if old is not None:
+        old.shutdown(wait=False)
+
+
+async def run_blocking(fun: Callable[..., T], *args, executor: Optional[ThreadPoolExecutor] = None, **kwargs) -> T:
+    """
+    Runs a blocking function on the executor (the shared bounded pool by default) and awaits its result.
+    :param fun: function to run
+    :param executor: optional executor to use instead of the shared one
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor or get_executor(), functools.partial(fun, *args, **kwargs))
+
+
+async def scan(p: Union[Path, str], max_depth: int = -1, prune: Optional[Callable[[Path], bool]] = None,
+               follow_symlinks: bool = True, onerror: Optional[Callable[[OSError], None]] = None,
+               executor: Optional[ThreadPoolExecutor] = None) -> AsyncIterator[ScannedDir]:
+    """
+    Async version of pycomfort.files.scan: yields every directory of the tree depth-first as a ScannedDir,
+    listing one directory at a time on the executor.
+
+    Args:
+        p: Path or string path to start from
+        max_depth: Maximum depth to descend to (-1 for unlimited)
+        prune: Optional function, directories for which it returns True are not descended into (called on the executor)
+        follow_symlinks: If True, symlinked directories are descended into (each real directory only once)
+        onerror: Optional function called with the OSError of a directory that can not be listed,
+            if not provided the error is raised
+        executor: Optional executor to use instead of the shared one
+    """
+    root = Path(p)
+    visited = set()
+    if follow_symlinks:
+        st = await run_blocking(root.stat, executor=executor)
+        visited.add((st.st_dev, st.st_ino))
+    stack = [(root, 0)]
+    while stack:
+        path, level = stack.pop()
+        try:
+            scanned, subdirs = await run_blocking(_list_dir, path, level, level != max_depth, prune, follow_symlinks,
+                                                  executor=executor)
+        except OSError as e:
+            if onerror is None:
+                raise
+            onerror(e)
+            continue
+        yield scanned
+        fresh = []
+        for sub, key in subdirs:
+            if key is not None:
+                if key in visited:
+                    continue
+                visited.add(key)
+            fresh.append((sub, level + 1))
+        stack.extend(reversed(fresh))
+
+
+async def walk_files(p: Union[Path, str], fun: Optional[Callable[[Path], bool]] = None, max_depth: int = -1,
+                     prune: Optional[Callable[[Path], bool]] = None, follow_symlinks: bool = True,
+                     executor: Optional[ThreadPoolExecutor] = None) -> AsyncIterator[Path]:
+    """
+    Yields every file of the tree (optionally only those for which fun returns True) as soon as its folder is listed.
+    :param p: folder to start from
+    :param fun: optional filter
+    :param max_depth: how deep to traverse, by default -1 which is unlimited
+    :param prune: optional function, directories for which it returns True are not descended into
+    :param follow_symlinks: descend into symlinked directories
+    :param executor: optional executor to use instead of the shared one
+    """
+    async for scanned in scan(p, max_depth, prune, follow_symlinks, executor=executor):
+        for entry in scanned.files:
+            path = Path(entry.path)
+            if fun is None or fun(path):
+                yield path
+
+
+async def traverse(p: Union[Path, str], fun: Optional[Callable[[Path], bool]] = None, max_depth: int = -1,
+                   prune: Optional[Callable[[Path], bool]] = None, follow_symlinks: bool = True,
+                   executor: Optional[ThreadPoolExecutor] = None) -> list[Path]:
+    """Awaitable version of pycomfort.files.traverse (flattened), the whole walk runs as one executor job"""
+    return await run_blocking(files.traverse, p, fun, max_depth, prune=prune, follow_symlinks=follow_symlinks,
+                              executor=executor)
+
+
+async def replace_in_file(file: Path, what: str, to: Union[str, Callable], output: Optional[Path] = None,
+                          executor: Optional[ThreadPoolExecutor] = None, **kwargs) -> Path:
+    """Awaitable version of pycomfort.files.replace_in_file, keyword arguments are passed through"""
+    return await run_blocking(files.replace_in_file, file, what, to, output, executor=executor, **kwargs)
+
+
+async def replace_from_dict_in_file(file: Path, replacement: Union[dict, CompiledDictionary, RegexDictionary],
+                                    output: Optional[Path] = None, executor: Optional[ThreadPoolExecutor] = None,
+                                    **kwargs) -> Path:
+    """Awaitable version of pycomfort.files.replace_from_dict_in_file, keyword arguments are passed through"""
+    return await run_blocking(files.replace_from_dict_in_file, file, replacement, output, executor=executor, **kwargs)
+
+
+async def rename_files_with_dictionary(files_or_path: Union[Iterable[Path], Path, str], dictionary: dict,
+                                       dry_run: bool = False, executor: Optional[ThreadPoolExecutor] = None,
+                                       **kwargs) -> list[tuple[str, str]]:
+    """Awaitable version of pycomfort.files.rename_files_with_dictionary, the batch is planned and applied as a whole"""
+    return await run_blocking(files.rename_files_with_dictionary, files_or_path, dictionary, dry_run,
+                              executor=executor, **kwargs)
+
+
+async def bounded_map(fun: Callable[[T], object], items: Union[Iterable[T], AsyncIterator[T]], limit: int = 4,
+                      executor: Optional[ThreadPoolExecutor] = None) -> list:
+    """
+    Runs a blocking function for every item on the executor with at most limit calls in flight,
+    items can come from an async generator (such as walk_files) and are consumed as slots free up.
+    If the awaiting task is cancelled (or a call fails), no new calls are started, the running ones are awaited
+    and the cancellation (or the error) is raised.
+    :return: results in the order of the items
+    """
+    results: dict[int, object] = {}
+    running: set[asyncio.Future] = set()
+
+    async def consume(index: int, item: T):
+        results[index] = await run_blocking(fun, item, executor=executor)
+
+    async def items_of():
+        if hasattr(items, "__aiter__"):
+            async for item in items:
+                yield item
+        else:
+            for item in items:
+                yield item
+
+    index = 0
+    try:
+        async for item in items_of():
+            if len(running) >= limit:
+                done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    task.result()
+            running.add(asyncio.ensure_future(consume(index, item)))
+            index += 1
+        if running:
+            # unlike gather, wait does not cancel the tasks when the caller is cancelled
+            await asyncio.wait(running)
+            for task in running:
+                task.result()
+    except BaseException:
+        # executor jobs can not be interrupted, wait for the started ones so that no file is left half processed
+        if running:
+            await asyncio.wait(running)
+        raise
+    return [results[i] for i in range(index)]
+
+
+async def replace_in_files(targets: Union[Iterable[Path], AsyncIterator[Path]],
+                           replacement: Union[dict, CompiledDictionary, RegexDictionary],
+                           mode: Union[ReplaceMode, str] = ReplaceMode.SEQUENTIAL, regex: bool = False,
+                           limit: int = 4, executor: Optional[ThreadPoolExecutor] = None) -> list[Path]:
+    """
+    Applies a replacement dictionary in place to many files with at most limit files processed at a time.
+    The dictionary is compiled once, files without matches are not rewritten.
+    :param targets: files, or an async generator of files such as walk_files
+    :param replacement: dictionary of replacements, CompiledDictionary or RegexDictionary
+    :param mode: ReplaceMode used when replacement is a plain dictionary
+    :param regex: if True, keys are regular expressions
+    :param limit: maximum number of files processed concurrently
+    :param executor: optional executor to use instead of the shared one
+    :return: processed files
+    """
+    compiled = compile_dictionary(replacement, mode, regex)
+    return await bounded_map(lambda f: files.replace_from_dict_in_file(f, compiled), targets, limit, executor)
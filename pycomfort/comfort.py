@@ -3,7 +3,9 @@ from pathlib import Path
 from typing import Optional
 
 import typer
-from pycomfort.files import replace_in_file, replace_from_dict_in_file
+from pycomfort.files import replace_in_file, replace_from_dict_in_file, replace_with_counts_in_file, replace_in_tree, TreeReplaceSummary
+from pycomfort.progress import TerminalProgress
+from pycomfort.replacements import ReplaceMode
 
 app = typer.Typer()
 
@@ -12,7 +14,10 @@ def replace(
     file: Path = typer.Option(..., exists=True, help="rename file with substitution"),
     what: str = typer.Option(..., help="substitute --from"),
     to: str = typer.Option(..., help="substitute --to"),
-    output: Optional[Path] = typer.Option(None, help="optional output, will rewrite --file is not output provided")
+    output: Optional[Path] = typer.Option(None, help="optional output, will rewrite --file is not output provided"),
+    chunk_size: Optional[int] = typer.Option(None, help="stream the file in chunks of this many characters instead of reading it whole"),
+    binary: bool = typer.Option(False, help="memory-map the file and replace bytes without decoding it, files without matches are not rewritten"),
+    regex: bool = typer.Option(False, help="--what is a regular expression and --to may use backreferences like \\1")
 ) -> Path:
     """Replace text in a file with new text.
     
@@ -21,6 +26,9 @@ def replace(
         what: Text to search for and replace
         to: Text to replace matches with
         output: Optional output file path. If not provided, will modify input file in-place
+        chunk_size: Optional chunk size for streaming files that do not fit into memory
+        binary: If True, replaces UTF-8 bytes in a memory-mapped file and leaves files without matches untouched
+        regex: If True, treats what as a regular expression and prints the number of matches
         
     Returns:
         Path to the modified file (either input file or output file)
@@ -28,16 +36,27 @@ def replace(
     Example:
         replace --file=config.txt --what="DEBUG" --to="INFO"
     """
+    if regex and (binary or chunk_size is not None):
+        raise typer.BadParameter("--regex can not be combined with --binary or --chunk-size")
     print(f"replacing {what} to {to} in {file}")
     where = output
-    return replace_in_file(file, what, to, where)
+    if regex:
+        where, counts = replace_with_counts_in_file(file, {what: to}, where, regex=True)
+        print(f"{counts[what]} matches of {what}")
+        return where
+    return replace_in_file(file, what, to, where, chunk_size, binary)
 
 @app.command("replace_with_dictionary")
 def replace_dict(
     file: Path = typer.Option(..., exists=True, help="rename file with substitution"),
     dictionary: Path = typer.Option(..., exists=True, help="dictionary to load from"),
     output: Optional[Path] = typer.Option(None, help="optional output, will rewrite --file is not output provided"),
-    verbose: bool = typer.Option(False, help="if we should output more to console")
+    verbose: bool = typer.Option(False, help="if we should output more to console"),
+    mode: Optional[ReplaceMode] = typer.Option(None, help="sequential applies keys one by one, simultaneous replaces all keys in one pass; defaults to sequential, or simultaneous with --chunk-size"),
+    chunk_size: Optional[int] = typer.Option(None, help="stream the file in chunks of this many characters (requires simultaneous mode)"),
+    regex: bool = typer.Option(False, help="dictionary keys are regular expressions, values may use backreferences like \\1"),
+    manifest: Optional[Path] = typer.Option(None, help="manifest file, skips the file if it was already processed with the same dictionary"),
+    progress: bool = typer.Option(False, help="show bytes read and written and their rates on stderr")
 ) -> Path:
     """Replace multiple text patterns in a file using a JSON dictionary.
     
@@ -46,6 +65,13 @@ def replace_dict(
         dictionary: Path to JSON file containing old->new text mappings
         output: Optional output file path. If not provided, will modify input file in-place
         verbose: If True, prints detailed replacement information
+        mode: Whether keys are applied one by one (sequential) or all together in a single pass (simultaneous),
+            streaming with chunk_size always uses simultaneous
+        chunk_size: Optional chunk size for streaming files that do not fit into memory
+        regex: If True, treats the keys as regular expressions and prints the number of matches of every pattern
+            (with --verbose as part of the detailed output)
+        manifest: Optional SQLite manifest of processed files for in-place runs that are repeated over the same files
+        progress: If True, shows a progress line with throughput on stderr
         
     Returns:
         Path to the modified file (either input file or output file)
@@ -53,6 +79,12 @@ def replace_dict(
     Example:
         replace_with_dictionary --file=config.txt --dictionary=replacements.json --verbose
     """
+    if regex and chunk_size is not None:
+        raise typer.BadParameter("--regex can not be combined with --chunk-size")
+    if chunk_size is not None and mode == ReplaceMode.SEQUENTIAL:
+        raise typer.BadParameter("--chunk-size requires --mode=simultaneous")
+    if mode is None:
+        mode = ReplaceMode.SEQUENTIAL if chunk_size is None else ReplaceMode.SIMULTANEOUS
     print(f"replacing from {dictionary} in {file}")
     # reading the data from the file
     with dictionary.open("r+") as f:
@@ -62,7 +94,103 @@ def replace_dict(
     for k, v in js.items():
         print(f"REPLACE {k} WITH {v}\n")
     where = output
-    return replace_from_dict_in_file(file, js, where, verbose)
+    if regex and manifest is None and not verbose and not progress:
+        where, counts = replace_with_counts_in_file(file, js, where, mode, regex=True)
+        for pattern in js:
+            print(f"{counts[pattern]} matches of {pattern}")
+        return where
+    return replace_from_dict_in_file(file, js, where, verbose, mode, chunk_size, regex, manifest=manifest,
+                                     progress=TerminalProgress() if progress else None)
+
+@app.command("replace_tree")
+def replace_tree(
+    root: Path = typer.Option(..., exists=True, file_okay=False, help="folder to apply replacements in"),
+    dictionary: Path = typer.Option(..., exists=True, help="dictionary to load from"),
+    ext: Optional[list[str]] = typer.Option(None, help="only files with this extension, can be repeated"),
+    glob: Optional[list[str]] = typer.Option(None, help="only files which names match this glob, can be repeated"),
+    max_depth: int = typer.Option(-1, help="how deep to traverse, -1 for unlimited"),
+    workers: Optional[int] = typer.Option(None, help="number of worker processes, defaults to the number of CPUs"),
+    mode: ReplaceMode = typer.Option(ReplaceMode.SEQUENTIAL, help="sequential applies keys one by one, simultaneous replaces all keys in one pass"),
+    regex: bool = typer.Option(False, help="dictionary keys are regular expressions, values may use backreferences like \\1"),
+    manifest: Optional[Path] = typer.Option(None, help="manifest file, files already processed with the same dictionary are skipped"),
+    progress: bool = typer.Option(False, help="show processed files, bytes and their rates on stderr"),
+    verbose: bool = typer.Option(False, help="if we should output more to console")
+) -> TreeReplaceSummary:
+    """Replace multiple text patterns in every matching file of a folder using a JSON dictionary.
+
+    Args:
+        root: Folder to search for files in
+        dictionary: Path to JSON file containing old->new text mappings
+        ext: Extensions of files to process, all files if not provided
+        glob: File name globs to process, all files if not provided
+        max_depth: Maximum depth to traverse (-1 for unlimited)
+        workers: Number of worker processes
+        mode: Whether keys are applied one by one (sequential) or all together in a single pass (simultaneous)
+        regex: If True, treats the keys as regular expressions
+        manifest: Optional SQLite manifest of processed files, makes repeated runs over the same tree incremental
+        progress: If True, shows a progress line with throughput and CPU use on stderr
+        verbose: If True, prints every changed file
+
+    Returns:
+        Summary of files scanned, files changed, bytes rewritten and elapsed time
+
+    Example:
+        replace_tree --root=docs --dictionary=replacements.json --ext=.md --workers=8
+    """
+    print(f"replacing from {dictionary} in {root}")
+    with dictionary.open("r") as f:
+        js: dict = json.load(f)
+    summary = replace_in_tree(root, js, exts=ext, globs=glob, max_depth=max_depth, workers=workers, mode=mode, regex=regex,
+                              manifest=manifest, progress=TerminalProgress() if progress else None)
+    if verbose:
+        for changed in summary.changed:
+            print(f"changed {changed}")
+        for failed, reason in summary.failed:
+            print(f"failed {failed}: {reason}")
+    print(summary)
+    return summary
+
+@app.command("logs")
+def logs(
+    files: list[Path] = typer.Argument(..., exists=True, dir_okay=False, help="JSON log files, plain, .gz or .zst"),
+    action_type: Optional[str] = typer.Option(None, help="only messages of this action or message type"),
+    level: Optional[str] = typer.Option(None, help="only actions logged with at least this level, e.g. INFO"),
+    since: Optional[str] = typer.Option(None, help="only messages at or after this time (unix timestamp or ISO date)"),
+    until: Optional[str] = typer.Option(None, help="only messages before this time (unix timestamp or ISO date)"),
+    task_uuid: Optional[str] = typer.Option(None, help="only messages of this task"),
+    stats: bool = typer.Option(False, help="print duration statistics per action type instead of the messages"),
+    workers: Optional[int] = typer.Option(None, help="worker processes for --stats, defaults to the number of CPUs"),
+    top: int = typer.Option(20, help="number of action types to show with --stats, sorted by total time")
+):
+    """Query the JSON logs written by pycomfort logging destinations without loading them into memory.
+
+    Args:
+        files: Log files to scan, rotated and compressed segments included
+        action_type: Action or message type to keep
+        level: Minimum level of the kept actions
+        since: Start of the time range
+        until: End of the time range
+        task_uuid: Task to keep
+        stats: If True, prints count, failures, total, mean, p50, p95, p99 and max duration per action type
+        workers: Number of processes that scan files in parallel for --stats
+        top: Number of action types shown with --stats
+
+    Example:
+        logs app.json app.json.*.gz --action-type=load_file --since=2024-05-01 --stats
+    """
+    from pycomfort.logs import LogFilter, read_messages, parallel_action_durations
+    log_filter = LogFilter(action_type=action_type, level=level, since=since, until=until, task_uuid=task_uuid)
+    if not stats:
+        for message in read_messages(files, log_filter):
+            print(json.dumps(message))
+        return
+    durations = parallel_action_durations(files, log_filter, workers=workers)
+    ranked = sorted(durations.items(), key=lambda item: item[1].histogram.total, reverse=True)[:top]
+    print(f"{'action_type':40} {'count':>8} {'failed':>7} {'total ms':>12} {'mean ms':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    for name, action in ranked:
+        s = action.summary()
+        times = " ".join(f"{s[k] / 1e6:>10.3f}" for k in ("mean_ns", "p50_ns", "p95_ns", "p99_ns", "max_ns"))
+        print(f"{name[:40]:40} {s['count']:>8} {s['failed']:>7} {s['total_ns'] / 1e6:>12.3f} {times}")
 
 if __name__ == '__main__':
     app()
\ No newline at end of file
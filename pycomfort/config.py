@@ -1,30 +1,34 @@
 import sys
-from enum import Enum
-from typing import Union
-import warnings
-
-import dotenv
-from dotenv import load_dotenv
+import threading
+import time
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Union, Optional, Callable, Any
 import os
-from deprecated import deprecated
-
-from pycomfort.logging import LogLevel
 
-try:
-    from loguru import logger
-    HAS_LOGURU = True
-except ImportError:
-    HAS_LOGURU = False
+from pycomfort.levels import LogLevel
 
+# dotenv, deprecated and loguru are imported only when the functions that need them are used
+HAS_LOGURU = find_spec("loguru") is not None
 
 
 LOG_LEVELS = [loader.value for loader in LogLevel]
 
-@deprecated(
-    reason="Please configure loguru directly in your application. We will remove this in future versions",
-    version='0.0.17'
-)
-def configure_logger(log_level: Union[str, LogLevel], add_stdout: bool = False):
+
+def __getattr__(name: str):
+    # configure_logger is wrapped with the (slow to import) deprecated decorator on first access
+    if name == "configure_logger":
+        from deprecated import deprecated
+        wrapped = deprecated(
+            reason="Please configure loguru directly in your application. We will remove this in future versions",
+            version='0.0.17'
+        )(_configure_logger)
+        globals()["configure_logger"] = wrapped
+        return wrapped
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _configure_logger(log_level: Union[str, LogLevel], add_stdout: bool = False):
     """Configure loguru logger with specified log level and stdout options
     
     Args:
@@ -41,14 +45,161 @@ def configure_logger(log_level: Union[str, LogLevel], add_stdout: bool = False):
         raise ImportError("loguru is required for configure_logger but it is not installed. "
                         "Install it with: pip install loguru")
     
+    from loguru import logger
     level = log_level.value if isinstance(log_level, LogLevel) else log_level
     if level.upper() != LogLevel.NONE.value and add_stdout:
         logger.add(sys.stdout, level=level.upper())
     return logger
 
 
+_TRUE = {"1", "true", "yes", "on", "y", "t"}
+_FALSE = {"0", "false", "no", "off", "n", "f", ""}
+
+
+def _to_bool(value: str) -> bool:
+    lowered = value.strip().lower()
+    if lowered in _TRUE:
+        return True
+    if lowered in _FALSE:
+        return False
+    raise ValueError(f"can not interpret {value!r} as a boolean")
+
+
+def find_env_file(start: Optional[Union[Path, str]] = None, name: str = ".env") -> Optional[Path]:
+    """Looks for the env file in the start folder (current working directory by default) and its parents"""
+    folder = Path(start).resolve() if start is not None else Path.cwd()
+    for candidate in [folder, *folder.parents]:
+        path = candidate / name
+        if path.is_file():
+            return path
+    return None
+
+
+class EnvConfig:
+    """
+    Typed, cached access to the variables of an env file and the environment.
+
+    The file is parsed once (with python-dotenv) and parsed again only when its mtime or size changes,
+    which is checked at most once every check_interval seconds. Lookups never print and are thread-safe.
+    By default variables set in the environment win over the file, like load_dotenv(override=False).
+
+    Args:
+        path: Env file, if not provided it is looked for from the current working directory upwards
+        override: If True, values from the file win over the environment
+        check_interval: Minimal number of seconds between checks if the file changed, 0 to check on every lookup
+    """
+
+    def __init__(self, path: Optional[Union[Path, str]] = None, override: bool = False, check_interval: float = 1.0):
+        self.path = Path(path) if path is not None else find_env_file()
+        self.override = override
+        self.check_interval = check_interval
+        self._values: dict[str, str] = {}
+        self._signature: Optional[tuple] = None
+        self._checked = float("-inf")
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> dict[str, str]:
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return self._values
+        with self._lock:
+            if now - self._checked < self.check_interval:
+                return self._values
+            try:
+                st = os.stat(self.path) if self.path is not None else None
+            except FileNotFoundError:
+                st = None
+            signature = None if st is None else (st.st_mtime_ns, st.st_size)
+            if signature != self._signature:
+                if signature is None:
+                    values = {}
+                else:
+                    from dotenv import dotenv_values
+                    values = {k: v for k, v in dotenv_values(self.path).items() if v is not None}
+                self._values, self._signature = values, signature
+            self._checked = now
+            return self._values
+
+    def values(self) -> dict[str, str]:
+        """All variables of the file (after the environment has been applied according to override)"""
+        file_values = self._refresh()
+        if self.override:
+            return dict(file_values)
+        return {k: os.environ.get(k, v) for k, v in file_values.items()}
+
+    def get_raw(self, key: str) -> Optional[str]:
+        file_values = self._refresh()
+        if self.override and key in file_values:
+            return file_values[key]
+        value = os.environ.get(key)
+        return file_values.get(key) if value is None else value
+
+    def get(self, key: str, default: Any = None, cast: Callable[[str], Any] = str) -> Any:
+        """
+        Returns the value of the variable converted with cast, or default if it is not set.
+        bool is interpreted as true/false, yes/no, on/off, 1/0.
+        :param key: variable name
+        :param default: value returned (as it is) when the variable is not set
+        :param cast: type or function to convert the string value with
+        """
+        value = self.get_raw(key)
+        if value is None:
+            return default
+        return _to_bool(value) if cast is bool else cast(value)
+
+    def require(self, key: str, cast: Callable[[str], Any] = str) -> Any:
+        """Like get, but raises KeyError if the variable is not set"""
+        value = self.get_raw(key)
+        if value is None:
+            raise KeyError(f"{key} is set neither in the environment nor in {self.path}")
+        return _to_bool(value) if cast is bool else cast(value)
+
+    def get_int(self, key: str, default: Optional[int] = None) -> Optional[int]:
+        return self.get(key, default, int)
+
+    def get_float(self, key: str, default: Optional[float] = None) -> Optional[float]:
+        return self.get(key, default, float)
+
+    def get_bool(self, key: str, default: Optional[bool] = None) -> Optional[bool]:
+        return self.get(key, default, bool)
+
+    def get_list(self, key: str, default: Optional[list] = None, separator: str = ",") -> Optional[list[str]]:
+        return self.get(key, default, lambda v: [item.strip() for item in v.split(separator) if item.strip()])
+
+    def export(self):
+        """Sets the variables of the file in os.environ (respecting override)"""
+        for key, value in self._refresh().items():
+            if self.override or key not in os.environ:
+                os.environ[key] = value
+
+
+_configs: dict[tuple, EnvConfig] = {}
+_configs_lock = threading.Lock()
+
+
+def get_config(path: Optional[Union[Path, str]] = None, override: bool = False) -> EnvConfig:
+    """
+    Returns the shared EnvConfig of the env file, the file is discovered once per path (or working directory)
+    :param path: env file, looked for from the current working directory upwards if not provided
+    :param override: if True, values from the file win over the environment
+    """
+    key = (str(Path(path).resolve()) if path is not None else ("cwd", os.getcwd()), override)
+    config = _configs.get(key)
+    if config is None:
+        with _configs_lock:
+            config = _configs.setdefault(key, EnvConfig(path, override))
+    return config
+
+
+_loaded_env: dict[tuple, Optional[tuple]] = {}
+_loaded_env_lock = threading.Lock()
+
+
 def load_environment_keys(debug: bool = True, usecwd: bool = False):
     """Load OpenAI API key from .env file
+
+    The location of the file is found once and the file is loaded into the environment again only when it changes.
+    Prefer get_config for silent, typed access to any key.
     
     Args:
         debug: If True, prints debug information about env file location
@@ -58,17 +209,27 @@ def load_environment_keys(debug: bool = True, usecwd: bool = False):
     Returns:
         str: OpenAI API key if found, None otherwise
     """
-    # Find .env file location
-    e = dotenv.find_dotenv(usecwd=usecwd)
-    print(e)
-    if debug:
-        print(f"environment found at {e}")
-    
-    # Load environment variables from .env file
-    has_env: bool = load_dotenv(e, verbose=True, override=True)
-    if not has_env:
-        print("Did not found environment file, using system OpenAI key (if exists)")
+    from dotenv import find_dotenv, load_dotenv
+    search = (usecwd, os.getcwd())
+    with _loaded_env_lock:
+        if search not in _loaded_env:
+            # Find .env file location
+            _loaded_env[search] = (find_dotenv(usecwd=usecwd), None)
+        e, loaded = _loaded_env[search]
+        if debug:
+            print(f"environment found at {e}")
+        try:
+            st = os.stat(e) if e else None
+        except FileNotFoundError:
+            st = None
+        signature = None if st is None else (st.st_mtime_ns, st.st_size)
+        if signature is None:
+            print("Did not found environment file, using system OpenAI key (if exists)")
+        elif signature != loaded:
+            # Load environment variables from .env file
+            load_dotenv(e, verbose=debug, override=True)
+            _loaded_env[search] = (e, signature)
     
     # Get OpenAI key from environment variables
     openai_key = os.getenv('OPENAI_API_KEY')
-    return openai_key
\ No newline at end of file
+    return openai_key
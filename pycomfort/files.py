@@ -1,87 +1,205 @@
+from __future__ import annotations
+
+import os
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from fnmatch import fnmatch
+from functools import partial
 from pathlib import Path
-from typing import Union, Optional, Callable
-from functional import seq
-from functional.pipeline import Sequence
+from itertools import chain
+from typing import Union, Optional, Callable, Iterator, NamedTuple, TYPE_CHECKING
+
+from pycomfort.progress import Progress, ProgressSink, tracking
+from pycomfort.renames import RenamePlan
+from pycomfort.replacements import CompiledDictionary, RegexDictionary, ReplaceMode, compile_dictionary
+
+ProgressArg = Union[Progress, ProgressSink, Callable[[dict, bool], None], list, None]
+
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor, Future
+    from functional.pipeline import Sequence
+    from pycomfort.manifest import ReplaceManifest
+
+
+def seq(*args, **kwargs) -> Sequence:
+    """pyfunctional seq, imported on first use so that importing pycomfort.files stays fast"""
+    from functional import seq as functional_seq
+    return functional_seq(*args, **kwargs)
+
+
+def iter_children(p: Union[Path, str]) -> Iterator[Path]:
+    """
+    Lazily yields all files and subfolders in the given directory, listing stops as soon as the consumer does.
+    
+    Args:
+        p: Path or string path to the directory
+    """
+    with os.scandir(p) as it:
+        for entry in it:
+            yield Path(entry.path)
+
+
+def iter_dirs(p: Union[Path, str]) -> Iterator[Path]:
+    """
+    Lazily yields the subdirectories in the given directory, using the types cached by os.scandir.
+    
+    Args:
+        p: Path or string path to the directory
+    """
+    with os.scandir(p) as it:
+        for entry in it:
+            if entry.is_dir():
+                yield Path(entry.path)
 
 
-def children(p: Union[Path, str]) -> Sequence:
+def iter_files(p: Union[Path, str]) -> Iterator[Path]:
+    """
+    Lazily yields the files in the given directory, using the types cached by os.scandir.
+    
+    Args:
+        p: Path or string path to the directory
+    """
+    with os.scandir(p) as it:
+        for entry in it:
+            if entry.is_file():
+                yield Path(entry.path)
+
+
+def children(p: Union[Path, str], lazy: bool = False) -> Sequence:
     """
     Returns a sequence of all files and subfolders in the given directory.
     
     Args:
         p: Path or string path to the directory
+        lazy: If True, the sequence lists the directory on demand, so chained filter/take stop listing
+            as soon as they have enough results (a lazy sequence can only be consumed once)
     """
+    if lazy:
+        return seq(iter_children(p))
     path = Path(p) if isinstance(p, str) else p
     return seq(list(path.iterdir()))
 
 
-def dirs(p: Union[Path, str]) -> Sequence:
+def dirs(p: Union[Path, str], lazy: bool = False) -> Sequence:
     """
     Returns a sequence of only the subdirectories in the given directory.
     
     Args:
         p: Path or string path to the directory
+        lazy: If True, returns a lazy sequence backed by os.scandir (can only be consumed once)
     """
+    if lazy:
+        return seq(iter_dirs(p))
     path = Path(p) if isinstance(p, str) else p
     return children(path).filter(lambda f: f.is_dir())
 
 
-def files(p: Path) -> Sequence:
+def files(p: Path, lazy: bool = False) -> Sequence:
     """
     Returns a sequence of only the files in the given directory.
     
     Args:
         p: Path to the directory
+        lazy: If True, returns a lazy sequence backed by os.scandir (can only be consumed once)
         
     Returns:
         Sequence of Path objects representing files
     """
+    if lazy:
+        return seq(iter_files(p))
     return children(p).filter(lambda f: f.is_file())
 
 
-def with_ext(p: Path, ext: str) -> Sequence:
+def with_ext(p: Path, ext: str, lazy: bool = False) -> Sequence:
     """
     Returns files in the directory that have the specified extension.
     
     Args:
         p: Path to the directory
         ext: File extension to filter by (e.g., '.txt', '.py')
+        lazy: If True, returns a lazy sequence backed by os.scandir (can only be consumed once)
         
     Returns:
         Sequence of Path objects representing matching files
     """
-    return files(p).filter(lambda f: ext in f.suffix)
+    return files(p, lazy).filter(lambda f: ext in f.suffix)
 
 
 def by_ext(p: Path, ext: str) -> Sequence:
     return files(p).filter(lambda f: ext in f.suffix).group_by(lambda f: f.suffix)
 
 
-def rename_files_with_dictionary(files_or_path: Union[Sequence, Path, str], dictionary: dict) -> list[tuple[str, str]]:
+COMPRESSION_SUFFIXES = frozenset({".gz", ".bgz", ".bz2", ".xz", ".zst", ".lz4", ".z"})
+
+
+def normalized_ext(name: Union[Path, str]) -> str:
+    """
+    Returns the lower-case extension of a file name, keeping the inner extension of compressed files
+    (e.g. 'reads.FASTQ.gz' -> '.fastq.gz', 'data.tar.gz' -> '.tar.gz', 'notes.txt' -> '.txt', 'README' -> '')
+    :param name: file name or path
+    """
+    name = name.name if isinstance(name, Path) else os.path.basename(name)
+    base, ext = os.path.splitext(name.lower())
+    if ext in COMPRESSION_SUFFIXES:
+        inner = os.path.splitext(base)[1]
+        return inner + ext
+    return ext
+
+
+def rename_files_with_dictionary(files_or_path: Union[Sequence, Path, str], dictionary: dict,
+                                 dry_run: bool = False, workers: int = 0,
+                                 journal: Optional[Union[Path, str]] = None,
+                                 progress: ProgressArg = None) -> list[tuple[str, str]]:
     """
     Renames files based on a dictionary of old->new substring pairs.
+    All keys are applied to every name first, then the renames are checked for collisions
+    and applied as one batch (see pycomfort.renames.RenamePlan), reverting everything if one of them fails.
     
     Args:
         files_or_path: Path/string to a directory/file or a sequence of files
         dictionary: Dictionary mapping old substrings to new substrings
+        dry_run: If True, only returns what would be renamed
+        workers: If above 0, renames are done by this many threads
+        journal: Optional file to record completed renames in, see pycomfort.renames.rollback_journal
+        progress: Optional Progress, sink or list of sinks, considered files are counted as entries
+            and renamed ones as changed
+
+    Returns:
+        List of (old name, new name) of renamed files
     """
     if isinstance(files_or_path, str):
         files_or_path = Path(files_or_path)
     
     if isinstance(files_or_path, Path):
         if files_or_path.is_dir():
-            return rename_files_with_dictionary(files(files_or_path), dictionary=dictionary)
+            return rename_files_with_dictionary(files(files_or_path), dictionary, dry_run, workers, journal, progress)
         else:
-            return rename_files_with_dictionary(seq(files_or_path),  dictionary=dictionary)
+            return rename_files_with_dictionary(seq(files_or_path), dictionary, dry_run, workers, journal, progress)
     else:
-        results = []
-        for p in files_or_path:
-            for k, v in dictionary.items():
-                if k in p.name:
-                    new_name = p.name.replace(k, v)
-                    p.rename(Path(p.parent, p.name.replace(k, v)))
-                    results.append((p.name, new_name))
-        return results
+        with tracking("rename", progress) as tracker:
+            mapping = []
+            for p in files_or_path:
+                new_name = p.name
+                for k, v in dictionary.items():
+                    new_name = new_name.replace(k, v)
+                if new_name != p.name:
+                    mapping.append((p, p.with_name(new_name)))
+                if tracker is not None:
+                    tracker.add(entries=1)
+            renamed = RenamePlan(mapping).apply(dry_run=dry_run, workers=workers, journal=journal, progress=tracker)
+            return [(old.name, new.name) for old, new in renamed]
+
+
+def _rename_planned(paths: list, new_name: Callable[[Path], Optional[str]]) -> Sequence:
+    """Renames paths for which new_name returns a name in one batch, returns the sequence of resulting paths"""
+    targets = []
+    for p in paths:
+        name = new_name(p)
+        targets.append(p if name is None else p.with_name(name))
+    RenamePlan(zip(paths, targets)).apply()
+    return seq(targets)
 
 
 def rename_files(files_or_path: Union[Sequence, Path], has: str, what: str, to: str):
@@ -99,7 +217,7 @@ def rename_files(files_or_path: Union[Sequence, Path], has: str, what: str, to:
         else:
             return rename_files(seq(files_or_path), has, what, to)
     else:
-        return files_or_path.map(lambda p: p if has not in p.name else p.rename(Path(p.parent, p.name.replace(what, to))))
+        return _rename_planned(list(files_or_path), lambda p: None if has not in p.name else p.name.replace(what, to))
 
 
 def rename_not_files(files: Sequence, not_has: str, what: str, to: str) -> Sequence:
@@ -111,102 +229,868 @@ def rename_not_files(files: Sequence, not_has: str, what: str, to: str) -> Seque
     :param to: substitute to string
     :return: renamed files
     """
-    return files.map(lambda p: p if not_has in p.name else p.rename(Path(p.parent, p.name.replace(what, to))))
+    return _rename_planned(list(files), lambda p: None if not_has in p.name else p.name.replace(what, to))
 
 
-def replace_in_file(file: Path, what: str, to: str, output: Optional[Path] = None) -> Path:
+@contextmanager
+def _atomic_output(target: Path, like: Optional[Path] = None, binary: bool = False):
+    """
+    Yields a text stream to a temporary file next to target which replaces target only if writing succeeded.
+    :param target: file to (re)write
+    :param like: file to copy permission bits from
+    :param binary: yield a binary stream instead of a text one
+    """
+    import shutil
+    import tempfile
+    fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+    try:
+        with (os.fdopen(fd, "wb") if binary else os.fdopen(fd, "w", newline="")) as tmp:
+            yield tmp
+        if like is not None:
+            shutil.copymode(like, tmp_name)
+        os.replace(tmp_name, target)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+def _read_chunks(stream, chunk_size: int):
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+class _Unchanged(Exception):
+    """Raised inside _atomic_output to discard the temporary file of an in-place edit that changed nothing"""
+
+
+def _stream_replace(file: Path, compiled: Union[CompiledDictionary, RegexDictionary], output: Optional[Path],
+                    chunk_size: int, progress: Optional[Progress] = None) -> tuple[Path, bool]:
+    """
+    Streams the file through the compiled dictionary reading chunk_size characters at a time.
+    In-place edits go to a temporary file which atomically replaces the original, or is dropped if nothing changed.
+    With progress, read and written characters are reported after every chunk.
+    :return: written file and whether the text changed
+    """
+    target = file if output is None else output
+    # while nothing changed the output is a prefix of the input, pending is the read text it has not reached yet
+    pending, changed = "", False
+
+    def tracked(chunks: Iterator[str]) -> Iterator[str]:
+        nonlocal pending
+        for chunk in chunks:
+            if not changed:
+                pending += chunk
+            yield chunk
+
+    try:
+        with _atomic_output(target, like=file if output is None else None) as sink:
+            # the source is closed before the temporary file replaces it, Windows can not replace open files
+            with file.open("r", newline="") as source:
+                chunks = _read_chunks(source, chunk_size)
+                if progress is not None:
+                    chunks = _counted(chunks, progress)
+                for replaced in compiled.replace_chunks(tracked(chunks)):
+                    sink.write(replaced)
+                    if progress is not None:
+                        progress.add(bytes_written=len(replaced))
+                    if not changed:
+                        if pending.startswith(replaced):
+                            pending = pending[len(replaced):]
+                        else:
+                            changed, pending = True, ""
+            changed = changed or bool(pending)
+            if output is None and not changed:
+                raise _Unchanged()
+    except _Unchanged:
+        return target, False
+    return target, changed
+
+
+def _counted(chunks: Iterator[str], progress: Progress) -> Iterator[str]:
+    for chunk in chunks:
+        progress.add(bytes_read=len(chunk))
+        yield chunk
+
+
+def _mmap_replace(file: Path, what: bytes, to: bytes, output: Optional[Path]) -> Path:
+    """
+    Replaces bytes in a memory-mapped file, writing only the unchanged slices and the replacements.
+    Without matches an in-place file is not touched at all and an output is a plain copy.
+    """
+    import mmap
+    target = file if output is None else output
+    with file.open("rb") as source:
+        if os.fstat(source.fileno()).st_size == 0:
+            found = -1
+        else:
+            with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                found = mm.find(what)
+    if found < 0:
+        if output is not None:
+            import shutil
+            shutil.copyfile(file, output)
+        return target
+    with _atomic_output(target, like=file if output is None else None, binary=True) as sink:
+        # the map and the source are closed before the temporary file replaces it, Windows can not replace open files
+        with file.open("rb") as source, mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+                memoryview(mm) as view:
+            found = mm.find(what, found)
+            start = 0
+            while found >= 0:
+                sink.write(view[start:found])
+                sink.write(to)
+                start = found + len(what)
+                found = mm.find(what, start)
+            sink.write(view[start:])
+    return target
+
+
+def replace_in_file(file: Path, what: str, to: Union[str, Callable[[re.Match], str]], output: Optional[Path] = None,
+                    chunk_size: Optional[int] = None, binary: bool = False, encoding: str = "utf-8",
+                    regex: bool = False, flags: int = 0) -> Path:
     """
     Replaces text in the file
     :param file: file to make replacement
     :param what: which text to replace
     :param to: to what string
     :param output: path to the output file (or same file if no output provided)
-    :return:
+    :param chunk_size: if provided, the file is streamed in chunks of this many characters instead of being read whole,
+    memory use stays bounded by the chunk size and in-place edits are written through an atomic rename
+    :param binary: if True, the file is memory-mapped and searched as bytes without decoding it, only the unchanged
+    slices and the replacements are written and a file without matches is not rewritten (its mtime is kept).
+    Line endings are kept as they are
+    :param encoding: encoding of what and to in binary mode
+    :param regex: if True, what is a regular expression and to is a template (with \\1 style backreferences)
+    or a callable that gets the match and returns the new text
+    :param flags: re flags for the regular expression
+    :return: path to the written file
     """
+    if regex:
+        if binary or chunk_size is not None:
+            raise ValueError("regular expressions can not be combined with binary or chunked mode")
+        return replace_with_counts_in_file(file, {what: to}, output, regex=True, flags=flags)[0]
+    if binary:
+        if chunk_size is not None:
+            raise ValueError("chunk_size cannot be combined with binary mode")
+        if not what:
+            raise ValueError("cannot replace an empty string in binary mode")
+        return _mmap_replace(file, what.encode(encoding), to.encode(encoding), output)
+    if chunk_size is not None:
+        return _stream_replace(file, CompiledDictionary({what: to}), output, chunk_size)[0]
     in_place = output is None
     with file.open("r+") as text_file:
         s: str = text_file.read().replace(what, to)
         if in_place:
+            text_file.seek(0)
             text_file.write(s)
+            text_file.truncate()
             return file
         else:
             output.write_text(s)
             return output
 
 
-def replace_from_dict_in_file(file: Path, replacement: dict, output: Optional[Path] = None, verbose: bool = False) -> Path:
+@contextmanager
+def _opened_manifest(manifest: Union[ReplaceManifest, Path, str, None]):
+    """Yields the manifest as it is, or opens (and finally closes) one from a path"""
+    if manifest is None or not isinstance(manifest, (Path, str)):
+        yield manifest
+        return
+    from pycomfort.manifest import ReplaceManifest
+    with ReplaceManifest(manifest) as opened:
+        yield opened
+
+
+def replace_with_counts_in_file(file: Path, replacement: Union[dict, CompiledDictionary, RegexDictionary],
+                                output: Optional[Path] = None, mode: Union[ReplaceMode, str] = ReplaceMode.SEQUENTIAL,
+                                regex: bool = False, flags: int = 0) -> tuple[Path, Counter]:
     """
+    Replaces text in the file according to the dictionary and counts the matches of every key or pattern.
+    The dictionary is compiled through the cache of compile_dictionary, so calling this for many files
+    with the same dictionary compiles it only once.
     :param file: Path to the file
-    :param replacement: dictionary for replacing test in files
-    :param output:
-    :param verbose:
-    :return:
+    :param replacement: dictionary of replacements, CompiledDictionary or RegexDictionary
+    :param output: path to the output file (or same file if no output provided)
+    :param mode: ReplaceMode used when replacement is a plain dictionary
+    :param regex: if True, keys are regular expressions and values are templates or callables
+    :param flags: re flags for regular expressions
+    :return: path to the written file and a Counter of matches per key or pattern,
+    a file edited in place is not rewritten when nothing changed
     """
-    in_place = output is None
-    with file.open("r+") as text_file:
-        s: str = text_file.read()
-    for old, new in replacement.items():
-        if old in s:
-            if verbose:
-                print(f"REPLACING {old}\n WITH {new}")
-            s = s.replace(old, new) # warning: mutation!
-    if in_place:
-        if verbose:
-            print(f"editing {str(file)} in place")
-        with file.open("w") as rewrite:
+    compiled = compile_dictionary(replacement, mode, regex, flags)
+    with file.open("r") as text_file:
+        original: str = text_file.read()
+    s, counts = compiled.replace_with_counts(original)
+    target = file if output is None else output
+    if output is not None or s != original:
+        with target.open("w") as rewrite:
             rewrite.write(s)
+    return target, counts
+
+
+def replace_from_dict_in_file(file: Path, replacement: Union[dict, CompiledDictionary, RegexDictionary],
+                              output: Optional[Path] = None, verbose: bool = False,
+                              mode: Union[ReplaceMode, str] = ReplaceMode.SEQUENTIAL,
+                              chunk_size: Optional[int] = None, regex: bool = False, flags: int = 0,
+                              manifest: Union[ReplaceManifest, Path, str, None] = None,
+                              progress: ProgressArg = None) -> Path:
+    """
+    Replaces text in the file according to the dictionary. A file edited in place is not rewritten when nothing matched
+    :param file: Path to the file
+    :param replacement: dictionary for replacing test in files or a CompiledDictionary to reuse across files
+    :param output: path to the output file (or same file if no output provided)
+    :param verbose: print what is being replaced
+    :param mode: SEQUENTIAL applies keys one by one (legacy results), SIMULTANEOUS replaces all keys in a single pass.
+    Ignored when replacement is already a CompiledDictionary
+    :param chunk_size: if provided, the file is streamed in chunks of this many characters (requires SIMULTANEOUS mode)
+    :param regex: if True, keys are regular expressions and values are templates or callables (see RegexDictionary)
+    :param flags: re flags for regular expressions
+    :param manifest: ReplaceManifest or path to its file, in-place edits of files already processed with
+    the same dictionary (and unchanged since) are skipped without opening them
+    :param progress: optional Progress, sink or list of sinks to report bytes read and written to
+    (per chunk when streaming), so several calls can share one Progress
+    :return: path to the written file
+    """
+    compiled = compile_dictionary(replacement, mode, regex, flags)
+    with tracking("replace_from_dict_in_file", progress) as tracker:
+        return _replace_from_dict_in_file(file, compiled, output, verbose, chunk_size, manifest, tracker)
+
+
+def _replace_from_dict_in_file(file: Path, compiled: Union[CompiledDictionary, RegexDictionary], output: Optional[Path],
+                               verbose: bool, chunk_size: Optional[int],
+                               manifest: Union[ReplaceManifest, Path, str, None], progress: Optional[Progress]) -> Path:
+    in_place = output is None
+    if manifest is not None:
+        if not in_place:
+            raise ValueError("manifest can only be used for in-place replacements")
+        from pycomfort.manifest import dictionary_hash
+        digest = dictionary_hash(compiled)
+        with _opened_manifest(manifest) as opened:
+            if opened.is_processed(file, digest):
+                if verbose:
+                    print(f"skipping {str(file)}, it was already processed with this dictionary")
+                if progress is not None:
+                    progress.add(entries=1)
+                return file
+            _replace_from_dict_in_file(file, compiled, None, verbose, chunk_size, None, progress)
+            opened.record(file, digest)
         return file
-    else:
+    target = file if in_place else output
+    if chunk_size is not None:
         if verbose:
+            print(f"streaming {str(file)} with replacements to {str(target)}")
+        _, changed = _stream_replace(file, compiled, output, chunk_size, progress)
+        if progress is not None:
+            progress.add(entries=1, files_changed=1 if changed else 0)
+        return target
+    read = 0
+    if not verbose:
+        with file.open("r") as text_file:
+            if progress is not None:
+                read = os.fstat(text_file.fileno()).st_size
+            original: str = text_file.read()
+        s = compiled.replace(original)
+        changed = s != original
+        if not in_place or changed:
+            with target.open("w") as rewrite:
+                rewrite.write(s)
+    else:
+        if progress is not None:
+            read = os.path.getsize(file)
+        target, counts = replace_with_counts_in_file(file, compiled, output)
+        changed = bool(counts)
+        for old, count in counts.items():
+            print(f"REPLACING {old}\n WITH {compiled.replacement[old]} ({count} times)")
+        if in_place:
+            print(f"editing {str(file)} in place" if counts else f"nothing to replace in {str(file)}")
+        else:
             print(f"writing {str(file)} with replacements to {str(output)}")
-        output.write_text(s)
-        return output
+    if progress is not None:
+        written = os.path.getsize(target) if changed or not in_place else 0
+        progress.add(entries=1, bytes_read=read, bytes_written=written, files_changed=1 if changed else 0)
+    return target
 
 
-def traverse(p: Union[Path, str], fun: Callable[[Path], bool] = None, max_depth: int = -1, flatten: bool = True, depth: int = 0) -> list:
+class ScannedDir(NamedTuple):
+    """One listed directory: its path, depth and DirEntry objects of its files and subdirectories"""
+    path: Path
+    depth: int
+    files: list
+    dirs: list
+
+
+def _dir_key(entry: os.DirEntry, dev: Optional[int]) -> tuple[int, int]:
+    """
+    (st_dev, st_ino) identity of a subdirectory entry. Only symlinks are stat-ed, a real subdirectory
+    takes its inode from the listing and the device of the directory it is listed in.
+    """
+    if entry.is_symlink():
+        st = entry.stat()
+        return st.st_dev, st.st_ino
+    return dev, entry.inode()
+
+
+def _list_dir(path: Path, level: int, descend: bool, prune: Optional[Callable[[Path], bool]],
+              follow_symlinks: bool) -> tuple[ScannedDir, list]:
+    """
+    Lists one directory, returns it together with (path, identity) of subdirectories to descend into.
+    The identity is (st_dev, st_ino) when following symlinks and None otherwise.
+    """
+    fl, folds = [], []
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_file(follow_symlinks=follow_symlinks):
+                fl.append(entry)
+            elif entry.is_dir(follow_symlinks=follow_symlinks):
+                folds.append(entry)
+    subdirs = []
+    dev = None
+    if descend:
+        for entry in folds:
+            sub = Path(entry.path)
+            if prune is not None and prune(sub):
+                continue
+            if follow_symlinks:
+                if dev is None and not entry.is_symlink():
+                    dev = os.stat(path).st_dev
+                subdirs.append((sub, _dir_key(entry, dev)))
+            else:
+                subdirs.append((sub, None))
+    return ScannedDir(path, level, fl, folds), subdirs
+
+
+def scan(p: Union[Path, str], max_depth: int = -1, prune: Optional[Callable[[Path], bool]] = None,
+         follow_symlinks: bool = True, onerror: Optional[Callable[[OSError], None]] = None,
+         depth: int = 0, workers: int = 0, ordered: bool = True, progress: ProgressArg = None) -> Iterator[ScannedDir]:
     """
-    Recursively traverses a directory structure applying an optional filter function.
+    Iteratively walks a directory tree with os.scandir, listing every directory exactly once.
+    File and directory types come from the cached DirEntry information, so files are never stat-ed.
+    Directories are yielded depth-first in the same order traverse returns them.
+
+    Args:
+        p: Path or string path to start from
+        max_depth: Maximum depth to descend to (-1 for unlimited)
+        prune: Optional function, directories for which it returns True are not descended into
+            (called from worker threads when workers are used)
+        follow_symlinks: If True, symlinked directories are descended into (each real directory only once,
+            which protects from symlink loops); if False, symlinks are skipped
+        onerror: Optional function called with the OSError of a directory that can not be listed,
+            if not provided the error is raised
+        depth: Depth of the starting directory
+        workers: If above 0, directories are listed concurrently by this many threads,
+            which helps on network filesystems where every listing is a round trip
+        ordered: With workers, keep the depth-first order (True) or yield directories as soon as they are listed (False)
+        progress: Optional Progress, sink or list of sinks to report listed entries to (see pycomfort.progress)
+
+    Yields:
+        ScannedDir for every listed directory
+    """
+    with tracking("scan", progress) as tracker:
+        if tracker is None:
+            yield from _scan(p, max_depth, prune, follow_symlinks, onerror, depth, workers, ordered)
+            return
+        for scanned in _scan(p, max_depth, prune, follow_symlinks, onerror, depth, workers, ordered):
+            tracker.add(entries=len(scanned.files) + len(scanned.dirs))
+            yield scanned
+
+
+def _scan(p: Union[Path, str], max_depth: int, prune: Optional[Callable[[Path], bool]], follow_symlinks: bool,
+          onerror: Optional[Callable[[OSError], None]], depth: int, workers: int, ordered: bool) -> Iterator[ScannedDir]:
+    root = Path(p) if isinstance(p, str) else p
+    visited = set()
+    if follow_symlinks:
+        st = root.stat()
+        visited.add((st.st_dev, st.st_ino))
+
+    def unvisited(subdirs: list) -> list:
+        fresh = []
+        for sub, key in subdirs:
+            if key is not None:
+                if key in visited:
+                    continue
+                visited.add(key)
+            fresh.append(sub)
+        return fresh
+
+    if workers > 0:
+        yield from _scan_concurrently(root, depth, max_depth, prune, follow_symlinks, onerror, workers, ordered, unvisited)
+        return
+    stack = [(root, depth)]
+    while stack:
+        path, level = stack.pop()
+        try:
+            scanned, subdirs = _list_dir(path, level, level != max_depth, prune, follow_symlinks)
+        except OSError as e:
+            if onerror is None:
+                raise
+            onerror(e)
+            continue
+        yield scanned
+        for sub in reversed(unvisited(subdirs)):
+            stack.append((sub, level + 1))
+
+
+def _scan_concurrently(root: Path, depth: int, max_depth: int, prune, follow_symlinks: bool, onerror,
+                       workers: int, ordered: bool, unvisited: Callable[[list], list]) -> Iterator[ScannedDir]:
+    """
+    Lists directories from a bounded thread pool. In ordered mode results are consumed depth-first and only
+    the next few listings to be consumed (at most four per worker) are running or waiting at a time, so wide trees
+    do not queue a listing for every discovered directory; in unordered mode every finished listing is yielded
+    immediately and its subdirectories are queued right away.
+    """
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+    def submit(pool: ThreadPoolExecutor, path: Path, level: int) -> Future:
+        return pool.submit(_list_dir, path, level, level != max_depth, prune, follow_symlinks)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            if ordered:
+                limit = 4 * workers
+                # entries are [path, depth, future], the future is None until the listing is submitted
+                stack = [[root, depth, None]]
+                outstanding = 0
+                while stack:
+                    # the top of the stack is consumed first, so submit from there until the limit is reached
+                    for entry in reversed(stack):
+                        if outstanding >= limit:
+                            break
+                        if entry[2] is None:
+                            entry[2] = submit(pool, entry[0], entry[1])
+                            outstanding += 1
+                    future = stack.pop()[2]
+                    outstanding -= 1
+                    try:
+                        scanned, subdirs = future.result()
+                    except OSError as e:
+                        if onerror is None:
+                            raise
+                        onerror(e)
+                        continue
+                    yield scanned
+                    stack.extend([sub, scanned.depth + 1, None] for sub in reversed(unvisited(subdirs)))
+            else:
+                pending = {submit(pool, root, depth)}
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        try:
+                            scanned, subdirs = future.result()
+                        except OSError as e:
+                            if onerror is None:
+                                raise
+                            onerror(e)
+                            continue
+                        pending.update(submit(pool, sub, scanned.depth + 1) for sub in unvisited(subdirs))
+                        yield scanned
+        finally:
+            # stop listing as soon as the consumer is gone or an error is raised
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+def walk(p: Union[Path, str], fun: Callable[[Path], bool] = None, max_depth: int = -1,
+         prune: Optional[Callable[[Path], bool]] = None, follow_symlinks: bool = True,
+         onerror: Optional[Callable[[OSError], None]] = None, workers: int = 0, ordered: bool = True,
+         progress: ProgressArg = None) -> Iterator[Path]:
+    """
+    Lazily yields files and folders of a directory tree in the same order as traverse with flatten=True.
+
+    Args:
+        p: Path or string path to start traversal from
+        fun: Optional filter function that takes a Path and returns bool
+        max_depth: Maximum depth to traverse (-1 for unlimited)
+        prune: Optional function, directories for which it returns True are not descended into
+        follow_symlinks: If True, follows symlinks with symlink-loop protection; if False, skips them
+        onerror: Optional function called with errors of directories that can not be listed
+        workers: If above 0, directories are listed concurrently by this many threads
+        ordered: With workers, keep the traverse order (True) or yield results as soon as they are listed (False)
+        progress: Optional Progress, sink or list of sinks to report listed entries to (see pycomfort.progress)
+
+    Yields:
+        Path objects that match the filter criteria
+    """
+    for scanned in scan(p, max_depth, prune, follow_symlinks, onerror, workers=workers, ordered=ordered,
+                        progress=progress):
+        for entry in chain(scanned.files, scanned.dirs):
+            path = Path(entry.path)
+            if fun is None or fun(path):
+                yield path
+
+
+def traverse(p: Union[Path, str], fun: Callable[[Path], bool] = None, max_depth: int = -1, flatten: bool = True, depth: int = 0,
+             prune: Optional[Callable[[Path], bool]] = None, follow_symlinks: bool = True,
+             workers: int = 0, ordered: bool = True, progress: ProgressArg = None) -> list:
+    """
+    Traverses a directory structure applying an optional filter function.
+    Every directory is listed once with os.scandir and no recursion is used, so deep trees are fine.
     
     Args:
         p: Path or string path to start traversal from
         fun: Optional filter function that takes a Path and returns bool
         max_depth: Maximum depth to traverse (-1 for unlimited)
         flatten: If True, returns a flat list; if False, maintains directory structure
-        depth: Current traversal depth (used internally)
+        depth: Depth of the starting directory
+        prune: Optional function, directories for which it returns True are not descended into
+        follow_symlinks: If True, follows symlinks with symlink-loop protection; if False, skips them
+        workers: If above 0, directories are listed concurrently by this many threads
+        ordered: With workers, keep the usual order (True) or collect results in the order they are listed (False)
+        progress: Optional Progress, sink or list of sinks to report listed entries to (see pycomfort.progress)
         
     Returns:
         List of Path objects that match the filter criteria
     """
-    path = Path(p) if isinstance(p, str) else p
-    fl = files(path).to_list() if fun is None else files(path).filter(fun).to_list()
-    folds = dirs(path).to_list() if fun is None else dirs(path).filter(fun).to_list()
-    if depth == max_depth:
-        return fl + folds
-    else:
-        if flatten:
-            return fl + folds + dirs(path).flat_map(lambda d: traverse(d, fun, max_depth, flatten, depth + 1)).to_list()
-        else:
-            return fl + folds + dirs(path).map(lambda d: traverse(d, fun, max_depth, flatten, depth + 1)).to_list()
+    flat = []
+    nested = {}
+    with tracking("traverse", progress) as tracker:
+        for scanned in scan(p, max_depth, prune, follow_symlinks, depth=depth, workers=workers, ordered=ordered,
+                            progress=tracker):
+            items = [Path(e.path) for e in chain(scanned.files, scanned.dirs)]
+            level = items if fun is None else [i for i in items if fun(i)]
+            if flatten:
+                flat.extend(level)
+            else:
+                # subdirectories are listed after their parent, in listing order, so appending keeps the original layout
+                if nested:
+                    nested[scanned.path.parent].append(level)
+                nested[scanned.path] = level
+    return flat if flatten else next(iter(nested.values()), [])
+
+
+def classify_tree(p: Union[Path, str], exts: Optional[list[str]] = None, with_size: bool = False,
+                  max_depth: int = -1, prune: Optional[Callable[[Path], bool]] = None,
+                  follow_symlinks: bool = True, workers: int = 0, progress: ProgressArg = None) -> dict[str, list]:
+    """
+    Buckets every file of a tree by its normalized extension in one walk,
+    so finding all files of several types costs a single traversal.
+    :param p: folder to classify
+    :param exts: optional extensions to keep (e.g. ['.fastq.gz', '.bam']), compared after normalization
+    :param with_size: if True, buckets contain (Path, size) tuples taken from the same DirEntry stat
+    :param max_depth: how deep to traverse, by default -1 which is unlimited
+    :param prune: optional function, directories for which it returns True are not descended into
+    :param follow_symlinks: if True, follows symlinks with symlink-loop protection; if False, skips them
+    :param workers: if above 0, directories are listed concurrently by this many threads
+    :param progress: optional Progress, sink or list of sinks to report listed entries to (see pycomfort.progress)
+    :return: dictionary from normalized extension ('' for files without one) to the list of files
+    """
+    wanted = None if exts is None else {normalized_ext("file" + e if e.startswith(".") else "file." + e) for e in exts}
+    buckets: dict[str, list] = {}
+    for scanned in scan(p, max_depth, prune, follow_symlinks, workers=workers, progress=progress):
+        for entry in scanned.files:
+            ext = normalized_ext(entry.name)
+            if wanted is not None and ext not in wanted:
+                continue
+            item = (Path(entry.path), entry.stat().st_size) if with_size else Path(entry.path)
+            buckets.setdefault(ext, []).append(item)
+    return buckets
+
+
+def _human_size(size: int) -> str:
+    for unit in ["B", "KB", "MB", "GB", "TB"]:
+        if size < 1024 or unit == "TB":
+            return f"{size} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
 
 
-def tprint(p: Path, max_depth: int = -1,  prefix: str = "", debug: bool = False, depth: int = 0):
+def tprint(p: Path, max_depth: int = -1,  prefix: str = "", debug: bool = False, depth: int = 0,
+           max_entries_per_dir: Optional[int] = None, max_entries: Optional[int] = None, with_sizes: bool = False,
+           follow_symlinks: bool = True, file=None):
     """
-    Pretty-print the content of the folder recursively
+    Pretty-print the content of the folder recursively.
+    Every directory is listed once with os.scandir and the output is written in large buffered blocks.
     :param p: path to print content for
     :param max_depth: how deep to traverse, by default -1 which is unlimited
     :param prefix: prefix to add in the beginning
     :param debug: adding debug statements to separate files from folders
     :param depth: current depth
+    :param max_entries_per_dir: print at most this many files and this many folders of every folder,
+    the rest is summarized as "... N more files" / "... N more folders"
+    :param max_entries: stop printing after this many lines of entries (the walk stops too unless with_sizes is set)
+    :param with_sizes: end every printed folder with a "= F files, D folders, size" line for its whole subtree,
+    computed in the same walk (which then covers the whole tree, also below max_depth and hidden entries);
+    the totals of the root are printed even when max_entries stopped the output
+    :param follow_symlinks: descend into symlinked folders (each real folder only once)
+    :param file: stream to write to, sys.stdout by default
     :return:
     """
-    fl = files(p)
-    print(prefix+p.name)
-    if fl.len() > 0:
-        if debug:
-            print(prefix + "FILES:")
-        files(p).for_each(lambda f: print(f"\t"+prefix+f.name))
-    folders = dirs(p)
-    if folders.len() > 0 and depth != max_depth:
-        if debug:
-            print(prefix+"FOLDERS")
-        folders.for_each(lambda d: tprint(d, max_depth=max_depth, prefix = f"\t"+prefix, debug=debug, depth=depth+1))
\ No newline at end of file
+    import sys
+    out = sys.stdout if file is None else file
+    lines: list = []
+    shown = 0
+    truncated = False
+    visited = set()
+    if follow_symlinks:
+        st = p.stat()
+        visited.add((st.st_dev, st.st_ino))
+    # frames: ("dir", path, depth, prefix, visible, parent totals), ("line", text), ("entry", text)
+    # or ("exit", totals, prefix, visible, parent totals) which prints the totals of a finished subtree
+    # and adds them to its parent, so the output never has to be patched and is written in blocks
+    stack: list = [("dir", p, depth, prefix, True, None)]
+
+    def show(line: str) -> bool:
+        nonlocal shown, truncated
+        if truncated:
+            return False
+        if max_entries is not None and shown >= max_entries:
+            truncated = True
+            lines.append(prefix + f"... output stopped after {max_entries} entries")
+            return False
+        lines.append(line)
+        shown += 1
+        return True
+
+    while stack:
+        frame = stack.pop()
+        if frame[0] == "line":
+            if not truncated:
+                lines.append(frame[1])
+            continue
+        if frame[0] == "entry":
+            show(frame[1])
+            continue
+        if frame[0] == "exit":
+            _, totals, pre, visible, parent = frame
+            if visible and (not truncated or parent is None):
+                lines.append("\t" + pre + f"= {totals[0]} files, {totals[1]} folders, {_human_size(totals[2])}")
+            if parent is not None:
+                for i in range(3):
+                    parent[i] += totals[i]
+            continue
+        _, path, level, pre, visible, parent = frame
+        if truncated and not with_sizes:
+            break
+        if not (visible and show(pre + path.name)):
+            visible = False
+        try:
+            with os.scandir(path) as it:
+                fl, folds = [], []
+                for entry in it:
+                    if entry.is_file():
+                        fl.append(entry)
+                    elif entry.is_dir():
+                        folds.append(entry)
+        except OSError as e:
+            if visible:
+                lines.append("\t" + pre + f"[cannot list: {e.strerror}]")
+            continue
+        if fl and visible:
+            if debug:
+                lines.append(pre + "FILES:")
+            limit = len(fl) if max_entries_per_dir is None else max_entries_per_dir
+            for f in fl[:limit]:
+                if not show("\t" + pre + f.name):
+                    break
+            if len(fl) > limit and not truncated:
+                lines.append("\t" + pre + f"... {len(fl) - limit} more files")
+        descend = level != max_depth
+        totals = None
+        if with_sizes:
+            totals = [len(fl), len(folds), sum(f.stat(follow_symlinks=False).st_size for f in fl)]
+            stack.append(("exit", totals, pre, visible, parent))
+        if not folds or not (descend or with_sizes):
+            continue
+        if debug and visible and descend:
+            lines.append(pre + "FOLDERS")
+        limit = len(folds) if max_entries_per_dir is None else max_entries_per_dir
+        if visible and descend and len(folds) > limit:
+            stack.append(("line", "\t" + pre + f"... {len(folds) - limit} more folders"))
+        children = []
+        dev = None
+        for i, entry in enumerate(folds):
+            child_visible = visible and descend and i < limit
+            if not (child_visible or with_sizes):
+                continue
+            if not follow_symlinks and entry.is_symlink():
+                if child_visible:
+                    children.append(("entry", "\t" + pre + entry.name))
+                continue
+            if follow_symlinks:
+                if dev is None and not entry.is_symlink():
+                    dev = os.stat(path).st_dev
+                key = _dir_key(entry, dev)
+                if key in visited:
+                    continue
+                visited.add(key)
+            children.append(("dir", Path(entry.path), level + 1, "\t" + pre, child_visible, totals))
+        stack.extend(reversed(children))
+        if len(lines) > 8192:
+            out.write("\n".join(lines) + "\n")
+            lines.clear()
+    if lines:
+        out.write("\n".join(lines) + "\n")
+
+
+class TreeReplaceSummary:
+    """
+    Totals of a replace_in_tree run, changed keeps the paths of the rewritten files
+    and failed the (path, reason) of files that could not be processed (binary, not decodable or unreadable)
+    """
+
+    def __init__(self, files_scanned: int = 0):
+        self.files_scanned = files_scanned
+        self.files_skipped = 0
+        self.files_changed = 0
+        self.files_failed = 0
+        self.bytes_rewritten = 0
+        self.elapsed = 0.0
+        self.changed: list[Path] = []
+        self.failed: list[tuple[Path, str]] = []
+
+    def __str__(self) -> str:
+        skipped = f"skipped {self.files_skipped} already processed, " if self.files_skipped else ""
+        failed = f", failed {self.files_failed}" if self.files_failed else ""
+        return (f"scanned {self.files_scanned} files, {skipped}changed {self.files_changed}{failed}, "
+                f"rewrote {self.bytes_rewritten} bytes in {self.elapsed:.2f}s")
+
+
+# set only in pool worker processes, in-process runs pass the dictionary to _replace_one directly
+_worker_dictionary: Union[CompiledDictionary, RegexDictionary, None] = None
+
+
+def _init_replace_worker(compiled: Union[CompiledDictionary, RegexDictionary]):
+    global _worker_dictionary
+    _worker_dictionary = compiled
+
+
+def _replace_worker(file: Path, with_hash: bool = False) -> tuple:
+    """Replaces text in one file with the dictionary of the pool worker process"""
+    return _replace_one(_worker_dictionary, file, with_hash)
+
+
+def _replace_one(compiled: Union[CompiledDictionary, RegexDictionary], file: Path, with_hash: bool = False) -> tuple:
+    """
+    Replaces text in one file, returns the file, the number of bytes read and written,
+    the reason the file could not be processed (None if it was), so one bad file does not stop the whole tree,
+    and with_hash the manifest record (resolved path, size, mtime_ns, content hash) of the file as it was left,
+    hashed from the content already in memory
+    """
+    try:
+        if with_hash:
+            import locale
+            encoding = locale.getpreferredencoding(False)  # the encoding open() uses by default
+            with file.open("rb") as binary_file:
+                st = os.fstat(binary_file.fileno())
+                data = binary_file.read()
+            s: str = data.decode(encoding)
+        else:
+            with file.open("r", newline="") as text_file:
+                st = os.fstat(text_file.fileno())
+                s: str = text_file.read()
+    except UnicodeDecodeError:
+        return file, 0, 0, "not a text file in the expected encoding", None
+    except OSError as e:
+        return file, 0, 0, e.strerror or str(e), None
+    replaced = compiled.replace(s)
+    if replaced == s:
+        if not with_hash:
+            return file, st.st_size, 0, None, None
+        from pycomfort.manifest import content_hash
+        return file, st.st_size, 0, None, (str(file.resolve()), st.st_size, st.st_mtime_ns, content_hash(data))
+    try:
+        if not with_hash:
+            with _atomic_output(file, like=file) as rewrite:
+                rewrite.write(replaced)
+            return file, st.st_size, file.stat().st_size, None, None
+        data = replaced.encode(encoding)
+        with _atomic_output(file, like=file, binary=True) as rewrite:
+            rewrite.write(data)
+        from pycomfort.manifest import content_hash
+        written = file.stat()
+        record = (str(file.resolve()), written.st_size, written.st_mtime_ns, content_hash(data))
+        return file, st.st_size, written.st_size, None, record
+    except OSError as e:
+        return file, st.st_size, 0, e.strerror or str(e), None
+
+
+def _tree_targets(root: Union[Path, str], exts: Optional[list[str]], globs: Optional[list[str]],
+                  max_depth: int) -> list[Path]:
+    """
+    Files of the tree to process, using the types cached by scan. Extensions are compared after normalization,
+    so '.fastq.gz' matches 'reads.FASTQ.gz' and a compression suffix such as '.gz' matches every gzipped file
+    """
+    wanted = None if not exts else tuple(normalized_ext("file" + e if e.startswith(".") else "file." + e) for e in exts)
+    targets = []
+    for scanned in scan(root, max_depth):
+        for entry in scanned.files:
+            if wanted is not None:
+                ext = normalized_ext(entry.name)
+                if not any(ext == w or ext.endswith(w) for w in wanted):
+                    continue
+            if globs and not any(fnmatch(entry.name, g) for g in globs):
+                continue
+            targets.append(Path(entry.path))
+    return targets
+
+
+def _collect(summary: TreeReplaceSummary, results, manifest: Optional[ReplaceManifest] = None,
+             digest: Optional[str] = None, progress: Optional[Progress] = None) -> TreeReplaceSummary:
+    for file, read, written, error, record in results:
+        if progress is not None:
+            progress.add(entries=1, bytes_read=read, bytes_written=written, files_changed=1 if written else 0)
+        if error is not None:
+            summary.files_failed += 1
+            summary.failed.append((file, error))
+            continue
+        if manifest is not None:
+            key, size, mtime_ns, content = record
+            manifest.record(key, digest, size, mtime_ns, content)
+        if written:
+            summary.files_changed += 1
+            summary.bytes_rewritten += written
+            summary.changed.append(file)
+    return summary
+
+
+def replace_in_tree(root: Union[Path, str], replacement: Union[dict, CompiledDictionary, RegexDictionary],
+                    exts: Optional[list[str]] = None, globs: Optional[list[str]] = None, max_depth: int = -1,
+                    workers: Optional[int] = None, mode: Union[ReplaceMode, str] = ReplaceMode.SEQUENTIAL,
+                    regex: bool = False, flags: int = 0,
+                    manifest: Union[ReplaceManifest, Path, str, None] = None,
+                    progress: ProgressArg = None) -> TreeReplaceSummary:
+    """
+    Applies a replacement dictionary to every matching file under root using a process pool.
+    The dictionary is compiled once and shipped to each worker once, files without matches are not rewritten.
+    :param root: folder to start from
+    :param replacement: dictionary for replacing text in files or a CompiledDictionary
+    :param exts: extensions to include, compared after normalization like in classify_tree ('.gz' also matches '.fastq.gz'),
+    all files if not provided
+    :param globs: glob patterns for file names to include (e.g. "*.md"), all files if not provided
+    :param max_depth: how deep to traverse, by default -1 which is unlimited
+    :param workers: number of worker processes, None for os.cpu_count(), 1 to run in the current process
+    :param mode: ReplaceMode used when replacement is a plain dictionary
+    :param regex: if True, keys are regular expressions and values are templates or callables,
+    callables have to be picklable (module level functions) when several worker processes are used
+    :param flags: re flags for regular expressions
+    :param manifest: ReplaceManifest or path to its file, files already processed with the same dictionary
+    (and unchanged since) are skipped without being opened, processed files are recorded
+    :param progress: optional Progress, sink or list of sinks to report processed files, bytes read and written to
+    Files that can not be read as text (e.g. binary ones) or rewritten are counted as failed and the run goes on.
+    :return: summary with files scanned, files skipped, files changed, files failed, bytes rewritten and elapsed time
+    """
+    start = time.perf_counter()
+    compiled = compile_dictionary(replacement, mode, regex, flags)
+    targets = _tree_targets(root, exts, globs, max_depth)
+    summary = TreeReplaceSummary(files_scanned=len(targets))
+    with _opened_manifest(manifest) as opened, tracking("replace_in_tree", progress) as tracker:
+        digest = None
+        if opened is not None:
+            from pycomfort.manifest import dictionary_hash
+            digest = dictionary_hash(compiled)
+            targets = [f for f in targets if not opened.is_processed(f, digest)]
+            summary.files_skipped = summary.files_scanned - len(targets)
+            if tracker is not None:
+                tracker.add(entries=summary.files_skipped)
+        if workers == 1 or len(targets) < 2:
+            replace = partial(_replace_one, compiled, with_hash=opened is not None)
+            summary = _collect(summary, map(replace, targets), opened, digest, tracker)
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_replace_worker, initargs=(compiled,)) as pool:
+                chunk = max(1, len(targets) // ((workers or os.cpu_count() or 1) * 4))
+                replace = partial(_replace_worker, with_hash=opened is not None)
+                summary = _collect(summary, pool.map(replace, targets, chunksize=chunk), opened, digest, tracker)
+    summary.elapsed = time.perf_counter() - start
+    return summary
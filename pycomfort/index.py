@@ -0,0 +1,155 @@
+import hashlib
+import os
+import sqlite3
+from pathlib import Path
+from typing import Union, Optional
+
+from functional import seq
+from functional.pipeline import Sequence
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    path TEXT PRIMARY KEY,
+    parent TEXT NOT NULL,
+    name TEXT NOT NULL,
+    is_dir INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    suffix TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_parent ON entries(parent);
+CREATE INDEX IF NOT EXISTS entries_suffix ON entries(suffix);
+"""
+
+
+def default_index_file(root: Union[Path, str]) -> Path:
+    """
+    Returns the default location of the index for a folder: ~/.cache/pycomfort/index_<hash of the folder>.sqlite
+    :param root: indexed folder
+    """
+    digest = hashlib.sha1(str(Path(root).resolve()).encode()).hexdigest()[:16]
+    return Path.home() / ".cache" / "pycomfort" / f"index_{digest}.sqlite"
+
+
+class DirectoryIndex:
+    """
+    Persistent SQLite index of a directory tree with path, type, size and mtime of every entry.
+
+    refresh() compares the mtime of every indexed directory with the one on disk and re-lists only directories
+    that changed (entries were added, removed or renamed), so refreshing an unchanged tree costs one stat
+    per directory. Sizes and mtimes of files are taken when their directory is listed, use refresh(full=True)
+    to re-stat files that were modified in place. Symlinks are not indexed.
+    Queries return pyfunctional sequences of Paths, like the helpers in pycomfort.files.
+
+    Args:
+        root: Folder to index
+        index_file: SQLite file to keep the index in, see default_index_file for the default location
+    """
+
+    def __init__(self, root: Union[Path, str], index_file: Optional[Union[Path, str]] = None):
+        self.root = Path(root).resolve()
+        self.index_file = Path(index_file) if index_file is not None else default_index_file(self.root)
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.index_file))
+        self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self) -> "DirectoryIndex":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def refresh(self, full: bool = False) -> int:
+        """
+        Brings the index up to date with the disk.
+        :param full: re-list every directory, not only the ones whose mtime changed
+        :return: number of directories that were re-listed
+        """
+        relisted = 0
+        db = self.connection
+        with db:
+            known = dict(db.execute("SELECT path, mtime_ns FROM dirs"))
+            seen = set()
+            stack = [str(self.root)]
+            while stack:
+                path = stack.pop()
+                try:
+                    mtime_ns = os.stat(path).st_mtime_ns
+                except FileNotFoundError:
+                    continue
+                seen.add(path)
+                if not full and known.get(path) == mtime_ns:
+                    stack.extend(p for (p,) in db.execute(
+                        "SELECT path FROM entries WHERE parent = ? AND is_dir = 1", (path,)))
+                    continue
+                rows = self._list(path)
+                db.execute("DELETE FROM entries WHERE parent = ?", (path,))
+                db.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                db.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?)", (path, mtime_ns))
+                stack.extend(row[0] for row in rows if row[3])
+                relisted += 1
+            gone = [(p,) for p in known if p not in seen]
+            db.executemany("DELETE FROM dirs WHERE path = ?", gone)
+            db.executemany("DELETE FROM entries WHERE parent = ?", gone)
+        return relisted
+
+    @staticmethod
+    def _list(path: str) -> list:
+        rows = []
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_symlink():
+                    continue
+                st = entry.stat(follow_symlinks=False)
+                is_dir = entry.is_dir(follow_symlinks=False)
+                rows.append((entry.path, path, entry.name, int(is_dir), 0 if is_dir else st.st_size,
+                             st.st_mtime_ns, "" if is_dir else os.path.splitext(entry.name)[1]))
+        return rows
+
+    def _paths(self, query: str, args: tuple = ()) -> Sequence:
+        return seq([Path(p) for (p,) in self.connection.execute(query, args)])
+
+    def _folder(self, p: Optional[Union[Path, str]]) -> str:
+        return str(self.root if p is None else Path(p).resolve())
+
+    def children(self, p: Optional[Union[Path, str]] = None) -> Sequence:
+        """Indexed files and subfolders of the folder (root by default)"""
+        return self._paths("SELECT path FROM entries WHERE parent = ?", (self._folder(p),))
+
+    def dirs(self, p: Optional[Union[Path, str]] = None) -> Sequence:
+        """Indexed subfolders of the folder (root by default)"""
+        return self._paths("SELECT path FROM entries WHERE parent = ? AND is_dir = 1", (self._folder(p),))
+
+    def files(self, p: Optional[Union[Path, str]] = None) -> Sequence:
+        """Indexed files of the folder (root by default)"""
+        return self._paths("SELECT path FROM entries WHERE parent = ? AND is_dir = 0", (self._folder(p),))
+
+    def with_ext(self, ext: str, p: Optional[Union[Path, str]] = None) -> Sequence:
+        """
+        Indexed files with the given suffix (e.g. '.txt') in the whole tree,
+        or only in the folder p if it is provided
+        """
+        if p is None:
+            return self._paths("SELECT path FROM entries WHERE suffix = ? AND is_dir = 0", (ext,))
+        return self._paths("SELECT path FROM entries WHERE suffix = ? AND is_dir = 0 AND parent = ?",
+                           (ext, self._folder(p)))
+
+    def glob(self, pattern: str) -> Sequence:
+        """Indexed files and folders of the whole tree whose names match a glob pattern (e.g. 'sample_*.bam')"""
+        return self._paths("SELECT path FROM entries WHERE name GLOB ?", (pattern,))
+
+    def all_files(self) -> Sequence:
+        """Every indexed file of the tree"""
+        return self._paths("SELECT path FROM entries WHERE is_dir = 0")
+
+    def stat(self, p: Union[Path, str]) -> Optional[tuple[int, int]]:
+        """Indexed (size, mtime_ns) of a file or None if it is not indexed"""
+        return self.connection.execute(
+            "SELECT size, mtime_ns FROM entries WHERE path = ?", (str(Path(p).resolve()),)).fetchone()
@@ -0,0 +1,11 @@
+from enum import IntEnum
+
+
+class LogLevel(IntEnum):
+    """Enumeration of log levels with their corresponding numeric values"""
+    NONE = 0
+    DEBUG = 10
+    INFO = 20
+    WARNING = 30
+    ERROR = 40
+    CRITICAL = 50
@@ -13,31 +13,56 @@ from eliot.json import _dumps_bytes, _dumps_unicode, json_default
 
 from eliot._output import *
 import uuid
-from enum import IntEnum
+import atexit
+import queue
+import threading
+from collections import OrderedDict
+from enum import Enum
 from io import TextIOBase, IOBase
 
 
+import inspect
 import time
 from functools import wraps, partial
-from typing import Optional, Union, Sequence
-from eliot import log_call
-from enum import IntEnum
-
-class LogLevel(IntEnum):
-    """Enumeration of log levels with their corresponding numeric values"""
-    NONE = 0
-    DEBUG = 10
-    INFO = 20
-    WARNING = 30
-    ERROR = 40
-    CRITICAL = 50
-
-def format_time(seconds: float) -> str:
+from itertools import count
+from typing import Optional, Union, Sequence, Callable
+from eliot import log_call, log_message, start_action
+from pycomfort.rotation import RotatingLogFile
+from pycomfort.timing import TimingAggregator, default_aggregator
+from pycomfort.levels import LogLevel  # re-exported, defined separately so pycomfort.config does not need eliot
+from pycomfort.progress import ProgressSink
+
+def format_time(seconds: float, precision: int = 0) -> str:
+    """Formats seconds as HH:MM:SS, with precision > 0 adds that many digits of fractional seconds"""
     hours = int(seconds // 3600)
     seconds %= 3600
     minutes = int(seconds // 60)
-    seconds = int(seconds % 60)
-    return f"{hours:02}:{minutes:02}:{seconds:02}"
+    seconds = seconds % 60
+    if precision > 0:
+        return f"{hours:02}:{minutes:02}:{seconds:0{precision + 3}.{precision}f}"
+    return f"{hours:02}:{minutes:02}:{int(seconds):02}"
+
+
+# checked by every function decorated with log_function before anything is created
+_function_logging_enabled = True
+_function_log_level = LogLevel.NONE
+
+
+def set_function_logging(enabled: bool = True, level: Union[int, LogLevel] = LogLevel.NONE):
+    """Globally enables/disables log_function and sets the minimal level of calls that are logged.
+
+    @param enabled: If False, decorated functions are called directly without logging.
+    @param level: Calls of functions decorated with a lower log_level are not logged.
+    """
+    global _function_logging_enabled, _function_log_level
+    _function_logging_enabled = enabled
+    _function_log_level = level
+
+
+# fields set by Eliot or by log_function itself, arguments with these names are logged as arg_<name>
+_RESERVED_FIELDS = frozenset({"action_type", "action_status", "level", "message_type", "task_uuid", "task_level",
+                              "timestamp", "_serializers"})
+
 
 def log_function(
     wrapped_function=None,
@@ -45,68 +70,237 @@ def log_function(
     include_args=None,
     include_result=True,
     log_level: int = 20,  # INFO level by default
-    include_timing: bool = False
+    include_timing: bool = False,
+    sample_rate: int = 1,
+    aggregate: Union[bool, TimingAggregator] = False
 ):
     """Decorator/decorator factory that logs inputs, return result, and optionally execution time.
 
-    @param action_type: The action type to use. If not given the function name will be used.
-    @param include_args: If given, should be a list of strings, the arguments to log.
+    Disabled logging (see set_function_logging), calls below the global level and calls skipped by sampling
+    go straight to the function, no Eliot action or message is created for them.
+
+    @param action_type: The action type to use. If not given module.qualname of the function is used.
+    @param include_args: If None or True, all arguments are logged; if False, none; if a list of strings, only those.
+        Arguments named like Eliot fields (action_type, level, task_uuid, ...) are logged as arg_<name>.
     @param include_result: True by default. If False, the return result isn't logged.
     @param log_level: Integer indicating the logging level (default: 20/INFO)
-    @param include_timing: If True, logs execution time (default: False)
+    @param include_timing: If True, logs execution time measured with perf_counter_ns (default: False)
+    @param sample_rate: Log only one of every sample_rate calls (default: 1, every call)
+    @param aggregate: If True (or a TimingAggregator), no action is logged per call, every call is timed into
+        pycomfort.timing.default_aggregator (or the given one) which emits periodic summaries with percentiles
     """
     if wrapped_function is None:
         return partial(
-            log_call,
+            log_function,
             action_type=action_type,
             include_args=include_args,
             include_result=include_result,
             log_level=log_level,
-            include_timing=include_timing
+            include_timing=include_timing,
+            sample_rate=sample_rate,
+            aggregate=aggregate
         )
 
-    # ... existing action_type and include_args validation ...
+    if action_type is None:
+        action_type = f"{wrapped_function.__module__}.{wrapped_function.__qualname__}"
+    signature = inspect.signature(wrapped_function)
+    if isinstance(include_args, (list, tuple, set)):
+        missing = set(include_args) - set(signature.parameters)
+        if missing:
+            raise ValueError(f"{sorted(missing)} are not arguments of {wrapped_function.__qualname__}")
+        logged_args = set(include_args)
+    else:
+        logged_args = None if include_args in (None, True) else set()
+    calls = count()
+    field_names = {name: f"arg_{name}" if name in _RESERVED_FIELDS else name for name in signature.parameters}
 
-    @wraps(wrapped_function)
-    def _action(this, *args, **kwargs):
-        from eliot import Message, start_action
+    if aggregate:
+        aggregator = default_aggregator if aggregate is True else aggregate
 
-        if include_timing:
-            start_time = time.perf_counter()
+        @wraps(wrapped_function)
+        def _timed(*args, **kwargs):
+            if not _function_logging_enabled or log_level < _function_log_level:
+                return wrapped_function(*args, **kwargs)
+            started = time.perf_counter_ns()
+            try:
+                result = wrapped_function(*args, **kwargs)
+            except BaseException:
+                aggregator.record(action_type, time.perf_counter_ns() - started, failed=True)
+                raise
+            aggregator.record(action_type, time.perf_counter_ns() - started)
+            return result
 
-        with start_action(action_type=action_type) as ctx:
-            # ... existing argument logging logic ...
+        return _timed
 
-            result = wrapped_function(this, *args, **kwargs)
+    try:
+        level_name = LogLevel(log_level).name
+    except ValueError:
+        level_name = log_level
 
-            if include_timing:
-                end_time = time.perf_counter()
-                execution_time = end_time - start_time
-                Message.log(
-                    message_type="function_timing",
-                    level=log_level,
-                    message=f"{wrapped_function.__name__} took {format_time(execution_time)}"
-                )
+    @wraps(wrapped_function)
+    def _action(*args, **kwargs):
+        if not _function_logging_enabled or log_level < _function_log_level:
+            return wrapped_function(*args, **kwargs)
+        if sample_rate > 1 and next(calls) % sample_rate:
+            return wrapped_function(*args, **kwargs)
+
+        fields = {}
+        if logged_args is None or logged_args:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            fields = {field_names[k]: v for k, v in bound.arguments.items() if logged_args is None or k in logged_args}
 
+        with start_action(action_type=action_type, level=level_name, **fields) as ctx:
+            if include_timing:
+                started = time.perf_counter_ns()
+                result = wrapped_function(*args, **kwargs)
+                elapsed = time.perf_counter_ns() - started
+                ctx.add_success_fields(duration_ns=elapsed, duration=format_time(elapsed / 1e9, precision=6))
+            else:
+                result = wrapped_function(*args, **kwargs)
             if include_result:
                 ctx.add_success_fields(result=result)
-
             return result
 
-    # ... rest of the existing code ...
+    return _action
+
+
+class EliotProgress(ProgressSink):
+    """
+    Progress sink that logs snapshots of long file operations as Eliot messages, e.g.
+    replace_in_tree(root, dictionary, progress=EliotProgress()) or add_progress_sink(EliotProgress()) for all operations.
+
+    Args:
+        message_type: Eliot message type of the reports
+        interval: Minimal number of seconds between two messages, the final report is always logged
+    """
+
+    def __init__(self, message_type: str = "pycomfort:progress", interval: float = 5.0):
+        self.message_type = message_type
+        self.interval = interval
+
+    def __call__(self, snapshot: dict, final: bool):
+        log_message(message_type=self.message_type, final=final, **snapshot)
+
+
+class TaskAssembler:
+    """
+    Collects Eliot messages by task_uuid and hands every task over in one piece when its root action finishes,
+    so eliot-tree renders whole task trees instead of one fragment per message.
+
+    Memory is bounded: when more than max_tasks tasks are open, or a task has more than max_messages_per_task
+    messages, or it has been open for longer than max_age seconds, it is emitted as it is (incomplete)
+    and counted in evicted.
+
+    Args:
+        emit: Function called with the list of messages of a finished (or evicted) task
+        max_tasks: Maximum number of unfinished tasks kept in memory
+        max_messages_per_task: Maximum number of messages buffered for one task
+        max_age: Seconds after which an unfinished task is emitted anyway
+    """
+
+    def __init__(self, emit: Callable[[list], None], max_tasks: int = 10_000,
+                 max_messages_per_task: int = 10_000, max_age: float = 300.0):
+        self.emit = emit
+        self.max_tasks = max_tasks
+        self.max_messages_per_task = max_messages_per_task
+        self.max_age = max_age
+        self.evicted = 0
+        self._tasks: "OrderedDict[str, tuple[float, list]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _finishes_task(message: dict, open_task: bool) -> bool:
+        level = message.get("task_level", [1])
+        status = message.get("action_status")
+        if status is None:
+            # plain messages inside an open action (e.g. task_level [2] in the root action) do not end the task,
+            # only standalone messages are a whole task on their own
+            return not open_task or level == [1]
+        return len(level) == 1 and status in ("succeeded", "failed")
+
+    def add(self, message: dict):
+        """Buffers a message and emits its task if the message completes it"""
+        ready = []
+        with self._lock:
+            now = time.monotonic()
+            key = message.get("task_uuid")
+            entry = self._tasks.get(key)
+            messages = [] if entry is None else entry[1]
+            messages.append(message)
+            finished = self._finishes_task(message, entry is not None)
+            if finished or len(messages) >= self.max_messages_per_task:
+                if entry is not None:
+                    del self._tasks[key]
+                if not finished:
+                    self.evicted += 1
+                ready.append(messages)
+            elif entry is None:
+                self._tasks[key] = (now, messages)
+            ready.extend(self._expired(now))
+        for messages in ready:
+            self.emit(messages)
+
+    def _expired(self, now: float) -> list:
+        ready = []
+        # tasks are kept in the order they started, so the oldest ones are at the front
+        while self._tasks:
+            key, (started, messages) = next(iter(self._tasks.items()))
+            if len(self._tasks) <= self.max_tasks and now - started < self.max_age:
+                break
+            del self._tasks[key]
+            ready.append(messages)
+            self.evicted += 1
+        return ready
+
+    def evict_expired(self):
+        """Emits unfinished tasks that are older than max_age"""
+        with self._lock:
+            ready = self._expired(time.monotonic())
+        for messages in ready:
+            self.emit(messages)
+
+    def flush(self):
+        """Emits all buffered tasks, finished or not"""
+        with self._lock:
+            ready = [messages for _, messages in self._tasks.values()]
+            self._tasks.clear()
+        for messages in ready:
+            self.emit(messages)
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+
+def _render_to(rendered_file) -> Callable[[list], None]:
+    def render(messages: list):
+        try:
+            render_tasks(rendered_file.write, tasks_from_iterable(messages), colorize=False, human_readable=True)
+        except Exception as e:
+            rendered_file.write(f"Error rendering messages: {str(e)}\n")
+    return render
+
 
 class RenderingFileDestination(FileDestination):
     """
     A FileDestination that also renders messages in a human-readable format.
+    With assemble_tasks (default) every task is rendered once, as a whole tree, when its root action finishes,
+    unfinished tasks are rendered at exit.
     
     Args:
         json_file: File object for JSON log output (can be Path or TextIO)
         rendered_file: File object for human-readable log output (can be Path or TextIO)
         encoder: Optional custom JSON encoder
+        assemble_tasks: If True, messages are rendered per finished task, otherwise every message is rendered on its own
+        flush_every_message: If False, the JSON file is not flushed after every message, so its write buffer
+            is only written out when full (or when the file is flushed or closed)
     """
     rendered_file = field(mandatory=True)
+    assembler = field(mandatory=False, initial=None)
+    flush_every_message = field(mandatory=False, initial=True)
 
-    def __new__(cls, json_file, rendered_file, encoder=None):
+    def __new__(cls, json_file, rendered_file, encoder=None, assemble_tasks: bool = True,
+                flush_every_message: bool = True):
         # Handle both Path/string and TextIO objects for json_file
         if isinstance(json_file, (str, Path)):
             json_file = open(json_file, 'a')
@@ -115,16 +309,35 @@ class RenderingFileDestination(FileDestination):
         if isinstance(rendered_file, (str, Path)):
             rendered_file = open(rendered_file, 'a')
 
+        assembler = None
+        if assemble_tasks:
+            render = _render_to(rendered_file)
+
+            def emit(messages: list):
+                render(messages)
+                rendered_file.flush()
+            assembler = TaskAssembler(emit)
+            atexit.register(assembler.flush)
+
         return PClass.__new__(cls,
                             file=json_file,
                             rendered_file=rendered_file,
+                            assembler=assembler,
+                            flush_every_message=flush_every_message,
                             _dumps=_dumps_unicode if isinstance(json_file, (IOBase, TextIOBase)) else _dumps_bytes,
                             _linebreak="\n" if isinstance(json_file, (IOBase, TextIOBase)) else b"\n",
                             _json_default=json_default)
 
     def __call__(self, message):
         # First let parent class handle the JSON file writing
-        super().__call__(message)
+        if self.flush_every_message:
+            super().__call__(message)
+        else:
+            self.file.write(self._dumps(message, default=self._json_default) + self._linebreak)
+
+        if self.assembler is not None:
+            self.assembler.add(message)
+            return
         
         try:
             # Convert the message to tasks and render them
@@ -135,28 +348,234 @@ class RenderingFileDestination(FileDestination):
             self.rendered_file.write(f"Error rendering message: {str(e)}\n")
             self.rendered_file.flush()
 
-def to_nice_stdout(output_file: Optional[Path] = None, encoder=None, json_default=json_default):
+class OverflowPolicy(str, Enum):
+    """What QueuedRenderingDestination does with new messages when its queue is full"""
+    BLOCK = "block"  # wait until the writer catches up, nothing is lost
+    DROP = "drop"  # drop the new message
+    SAMPLE = "sample"  # keep one of every sample_rate overflowing messages (waiting for it) and drop the rest
+
+
+_FLUSH = object()
+_STOP = object()
+
+
+class QueuedRenderingDestination:
+    """
+    Eliot destination that writes JSON lines and renders them on a background thread.
+
+    Calling the destination only puts the message into a bounded queue. The writer thread takes messages in batches,
+    writes the JSON lines, renders the whole batch with eliot-tree at once and flushes the files
+    when flush_every messages were written or flush_interval seconds passed, instead of after every message.
+    Pending messages are drained on shutdown(), which is also registered to run at exit.
+    Messages that can not be serialized are replaced by a pycomfort:serialization_failure line and counted
+    in failed; errors of the writer are counted too, the thread keeps running.
+
+    Args:
+        json_file: File object for JSON log output (can be Path or TextIO)
+        rendered_file: File object for human-readable log output (can be Path or TextIO), None to skip rendering
+        batch_size: Maximum number of messages written and rendered together
+        flush_every: Flush the files after this many messages
+        flush_interval: Flush the files at least this often (seconds) while messages arrive
+        max_queue: Maximum number of queued messages
+        overflow: OverflowPolicy used when the queue is full
+        sample_rate: With OverflowPolicy.SAMPLE, one of this many overflowing messages is kept
+        json_default: JSON serialization function for unknown types
+        assemble_tasks: If True, every task is rendered once as a whole when its root action finishes
+            (see TaskAssembler), otherwise every batch is rendered as it is
+    """
+
+    def __init__(self, json_file, rendered_file=None, batch_size: int = 512, flush_every: int = 4096,
+                 flush_interval: float = 1.0, max_queue: int = 100_000,
+                 overflow: Union[OverflowPolicy, str] = OverflowPolicy.BLOCK, sample_rate: int = 100,
+                 json_default=json_default, assemble_tasks: bool = True):
+        self._owned = []
+        if isinstance(json_file, (str, Path)):
+            json_file = open(json_file, 'a')
+            self._owned.append(json_file)
+        if isinstance(rendered_file, (str, Path)):
+            rendered_file = open(rendered_file, 'a')
+            self._owned.append(rendered_file)
+        self.file = json_file
+        self.rendered_file = rendered_file
+        self.batch_size = batch_size
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.overflow = OverflowPolicy(overflow)
+        self.sample_rate = sample_rate
+        self.dropped = 0
+        self.failed = 0
+        self._overflowed = 0
+        self._json_default = json_default
+        self._render = None if rendered_file is None else _render_to(rendered_file)
+        self.assembler = TaskAssembler(self._render) if assemble_tasks and rendered_file is not None else None
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="pycomfort-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.shutdown)
+
+    def __call__(self, message):
+        if self.overflow == OverflowPolicy.BLOCK:
+            self._queue.put(message)
+            return
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            self._overflowed += 1
+            if self.overflow == OverflowPolicy.SAMPLE and self._overflowed % self.sample_rate == 0:
+                self._queue.put(message)
+            else:
+                self.dropped += 1
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Waits until every message queued so far is written and flushed, returns False on timeout"""
+        if self._stopped:
+            return True
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        return done.wait(timeout)
+
+    def shutdown(self, timeout: Optional[float] = None):
+        """Drains the queue, stops the writer thread and closes the files opened by the destination"""
+        if self._stopped:
+            return
+        self._stopped = True
+        atexit.unregister(self.shutdown)
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        for f in self._owned:
+            f.close()
+
+    def _run(self):
+        unflushed = 0
+        last_flush = time.monotonic()
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self.assembler is not None:
+                    self.assembler.evict_expired()
+                if unflushed:
+                    self._flush_files()
+                    unflushed, last_flush = 0, time.monotonic()
+                continue
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                messages = []
+                for item in batch:
+                    if item is _STOP or (isinstance(item, tuple) and item[0] is _FLUSH):
+                        self._write(messages)
+                        messages = []
+                        self._flush_files()
+                        unflushed, last_flush = 0, time.monotonic()
+                        if item is _STOP:
+                            if self.assembler is not None:
+                                self.assembler.flush()
+                                self._flush_files()
+                            return
+                        item[1].set()
+                    else:
+                        messages.append(item)
+                self._write(messages)
+                unflushed += len(messages)
+                if unflushed >= self.flush_every or time.monotonic() - last_flush >= self.flush_interval:
+                    self._flush_files()
+                    unflushed, last_flush = 0, time.monotonic()
+            except Exception:
+                # the writer must outlive any error, otherwise flush() and blocked callers would wait forever
+                self.failed += 1
+                for item in batch:
+                    if isinstance(item, tuple) and item[0] is _FLUSH:
+                        item[1].set()
+                if _STOP in batch:
+                    return
+
+    def _serialize(self, message) -> tuple[str, dict]:
+        try:
+            return _dumps_unicode(message, default=self._json_default), message
+        except Exception as e:
+            self.failed += 1
+            failure = {"message_type": "pycomfort:serialization_failure", "reason": repr(e)}
+            if isinstance(message, dict):
+                failure.update({k: message[k] for k in ("task_uuid", "task_level", "timestamp") if k in message})
+            return _dumps_unicode(failure, default=self._json_default), failure
+
+    def _write(self, messages: list):
+        if not messages:
+            return
+        serialized = [self._serialize(m) for m in messages]
+        self.file.write("".join(line + "\n" for line, _ in serialized))
+        if self.assembler is not None:
+            for _, message in serialized:
+                self.assembler.add(message)
+        elif self._render is not None:
+            self._render([message for _, message in serialized])
+
+    def _flush_files(self):
+        self.file.flush()
+        if self.rendered_file is not None:
+            self.rendered_file.flush()
+
+
+def _json_output(output_file: Path, max_bytes: Optional[int], rotate_interval: Optional[float],
+                 backups: Optional[int], compression: Optional[str], buffer_size: int):
+    """Opens the JSON log stream, rotating if any rotation option is set, closed at exit"""
+    if max_bytes is None and rotate_interval is None and backups is None and compression is None:
+        json_file = open(output_file, 'a', buffering=buffer_size)
+        atexit.register(json_file.close)
+        return json_file
+    return RotatingLogFile(output_file, max_bytes=max_bytes, rotate_interval=rotate_interval, backups=backups,
+                           compression=compression, buffer_size=buffer_size)
+
+
+def to_nice_stdout(output_file: Optional[Path] = None, encoder=None, json_default=json_default, background: bool = False,
+                   max_bytes: Optional[int] = None, rotate_interval: Optional[float] = None, backups: Optional[int] = None,
+                   compression: Optional[str] = None, buffer_size: int = -1):
     """Configure Eliot logging with improved rendering to stdout
     
     Args:
         output_file (Optional[Path]): Path to the JSON log file. If None, creates a temporary file
         encoder: Optional custom JSON encoder
         json_default: JSON serialization function for unknown types
+        background: If True, messages are written and rendered in batches by a background thread
+            (QueuedRenderingDestination) instead of on the logging thread
+        max_bytes: Rotate the JSON log when it grows over this size
+        rotate_interval: Rotate the JSON log after this many seconds
+        backups: Number of rotated JSON segments to keep
+        compression: Compress rotated segments in the background with "gzip" or "zstd"
+        buffer_size: Write buffer size of the JSON log in bytes, -1 for the default. A positive size also stops
+            flushing the JSON log after every message, so it is written out in blocks of this size
+    
+    Returns:
+        The registered destination
     """
     if output_file is None:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         temp_dir = Path("/tmp/just_semantic_search_logs")
         temp_dir.mkdir(parents=True, exist_ok=True)
         output_file = temp_dir / f"log_{timestamp}_{uuid.uuid4().hex[:8]}.json"
+    json_file = _json_output(output_file, max_bytes, rotate_interval, backups, compression, buffer_size)
     
-    destination = RenderingFileDestination(
-        json_file=output_file,
-        rendered_file=sys.stdout
-    )
+    if background:
+        destination = QueuedRenderingDestination(json_file=json_file, rendered_file=sys.stdout, json_default=json_default)
+    else:
+        destination = RenderingFileDestination(
+            json_file=json_file,
+            rendered_file=sys.stdout,
+            flush_every_message=buffer_size <= 0
+        )
     Logger._destinations.add(destination)
+    return destination
 
 
-def to_nice_file(output_file: Path, rendered_file: Path, encoder=None, json_default=json_default):
+def to_nice_file(output_file: Path, rendered_file: Path, encoder=None, json_default=json_default, background: bool = False,
+                 max_bytes: Optional[int] = None, rotate_interval: Optional[float] = None, backups: Optional[int] = None,
+                 compression: Optional[str] = None, buffer_size: int = -1):
     """Configure Eliot logging with improved rendering
     
     Args:
@@ -164,10 +583,29 @@ def to_nice_file(output_file: Path, rendered_file: Path, encoder=None, json_defa
         rendered_file (Path): Path to the human-readable rendered log file
         encoder: Optional custom JSON encoder
         json_default: JSON serialization function for unknown types
+        background: If True, messages are written and rendered in batches by a background thread
+            (QueuedRenderingDestination) instead of on the logging thread
+        max_bytes: Rotate the JSON log when it grows over this size
+        rotate_interval: Rotate the JSON log after this many seconds
+        backups: Number of rotated JSON segments to keep
+        compression: Compress rotated segments in the background with "gzip" or "zstd"
+        buffer_size: Write buffer size of the JSON log in bytes, -1 for the default. A positive size also stops
+            flushing the JSON log after every message, so it is written out in blocks of this size
+    
+    Returns:
+        The registered destination
     """
-    destination = RenderingFileDestination(
-        json_file=output_file,
-        rendered_file=rendered_file
-    )
+    json_file = _json_output(output_file, max_bytes, rotate_interval, backups, compression, buffer_size)
+    if isinstance(rendered_file, (str, Path)):
+        rendered_file = open(rendered_file, 'a')
+        atexit.register(rendered_file.close)
+    if background:
+        destination = QueuedRenderingDestination(json_file=json_file, rendered_file=rendered_file, json_default=json_default)
+    else:
+        destination = RenderingFileDestination(
+            json_file=json_file,
+            rendered_file=rendered_file,
+            flush_every_message=buffer_size <= 0
+        )
     Logger._destinations.add(destination)
-    # stdout: TextIO 
\ No newline at end of file
+    return destination
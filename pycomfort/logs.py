@@ -0,0 +1,187 @@
+import gzip
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Union, Optional, Iterator, Iterable, TextIO
+
+from pycomfort.levels import LogLevel
+from pycomfort.timing import LatencyHistogram
+
+
+def open_log(path: Union[Path, str]) -> TextIO:
+    """
+    Opens a JSON log for line by line reading, rotated segments compressed with gzip (.gz) or zstd (.zst) included.
+    :param path: log file
+    """
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt")
+    if path.suffix == ".zst":
+        import io
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstandard is required to read .zst logs but it is not installed. "
+                              "Install it with: pip install zstandard")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(path.open("rb"), closefd=True))
+    return path.open("r")
+
+
+def to_timestamp(value: Union[None, float, str, datetime]) -> Optional[float]:
+    """Converts a unix timestamp, an ISO date/time string or a datetime to a unix timestamp"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+class LogFilter:
+    """
+    Filter for Eliot messages. Cheap substring checks on the raw line run before JSON parsing,
+    so lines of other tasks or action types are skipped without being decoded.
+
+    Args:
+        action_type: Keep only messages of this action type (or message_type)
+        level: Keep only messages with a "level" field (as logged by log_function) of at least this level
+        since: Keep only messages logged at or after this time (timestamp, ISO string or datetime)
+        until: Keep only messages logged before this time (timestamp, ISO string or datetime)
+        task_uuid: Keep only messages of this task
+    """
+
+    def __init__(self, action_type: Optional[str] = None, level: Union[None, int, str, LogLevel] = None,
+                 since: Union[None, float, str, datetime] = None, until: Union[None, float, str, datetime] = None,
+                 task_uuid: Optional[str] = None):
+        self.action_type = action_type
+        self.level = LogLevel[level.upper()] if isinstance(level, str) else level
+        self.since = to_timestamp(since)
+        self.until = to_timestamp(until)
+        self.task_uuid = task_uuid
+        self._needles = [n for n in (action_type, task_uuid) if n]
+
+    def accepts_line(self, line: str) -> bool:
+        return all(n in line for n in self._needles)
+
+    def accepts(self, message: dict) -> bool:
+        if self.action_type is not None and \
+                self.action_type not in (message.get("action_type"), message.get("message_type")):
+            return False
+        if self.task_uuid is not None and message.get("task_uuid") != self.task_uuid:
+            return False
+        timestamp = message.get("timestamp", 0)
+        if self.since is not None and timestamp < self.since:
+            return False
+        if self.until is not None and timestamp >= self.until:
+            return False
+        if self.level is not None:
+            level = message.get("level")
+            if isinstance(level, str):
+                level = LogLevel.__members__.get(level.upper())
+            if level is None or level < self.level:
+                return False
+        return True
+
+
+def read_messages(paths: Union[Path, str, Iterable[Union[Path, str]]],
+                  log_filter: Optional[LogFilter] = None) -> Iterator[dict]:
+    """
+    Streams the messages of one or several JSON log files, keeping only those accepted by the filter.
+    Memory use does not depend on the file size. Lines which are not valid JSON are skipped.
+    :param paths: log file or files (plain, .gz or .zst)
+    :param log_filter: optional LogFilter
+    """
+    if isinstance(paths, (str, Path)):
+        paths = [paths]
+    for path in paths:
+        with open_log(path) as f:
+            for line in f:
+                if log_filter is not None and not log_filter.accepts_line(line):
+                    continue
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue
+                if log_filter is None or log_filter.accepts(message):
+                    yield message
+
+
+class ActionStats:
+    """Number of runs, failures and a latency histogram of one action type"""
+
+    def __init__(self):
+        self.failed = 0
+        self.histogram = LatencyHistogram()
+
+    def merge(self, other: "ActionStats"):
+        self.failed += other.failed
+        self.histogram.merge(other.histogram)
+
+    def summary(self) -> dict:
+        result = self.histogram.summary()
+        result["failed"] = self.failed
+        result["total_ns"] = self.histogram.total
+        return result
+
+
+def action_durations(paths: Union[Path, str, Iterable[Union[Path, str]]],
+                     log_filter: Optional[LogFilter] = None) -> dict[str, ActionStats]:
+    """
+    Pairs start and end messages of every action and collects duration statistics per action type.
+    Only actions that are still open are kept in memory while a file is scanned.
+    :param paths: log file or files
+    :param log_filter: optional LogFilter, level and time range are checked on the start message of an action
+    :return: dictionary from action type to its ActionStats
+    """
+    stats: dict[str, ActionStats] = {}
+    started: dict[tuple, float] = {}
+    # end messages carry no level and may fall out of the time range, so only starts are checked in full
+    by_task = None if log_filter is None else LogFilter(action_type=log_filter.action_type, task_uuid=log_filter.task_uuid)
+    for message in read_messages(paths, by_task):
+        status = message.get("action_status")
+        if status is None:
+            continue
+        level = message.get("task_level", [])
+        key = (message.get("task_uuid"), tuple(level[:-1]))
+        if status == "started":
+            if log_filter is None or log_filter.accepts(message):
+                started[key] = message.get("timestamp", 0.0)
+            continue
+        start = started.pop(key, None)
+        if start is None:
+            continue
+        action = stats.setdefault(message.get("action_type", ""), ActionStats())
+        action.histogram.record(max(int((message.get("timestamp", start) - start) * 1e9), 0))
+        if status == "failed":
+            action.failed += 1
+    return stats
+
+
+def _file_durations(args: tuple) -> dict[str, ActionStats]:
+    path, log_filter = args
+    return action_durations(path, log_filter)
+
+
+def parallel_action_durations(paths: Iterable[Union[Path, str]], log_filter: Optional[LogFilter] = None,
+                              workers: Optional[int] = None) -> dict[str, ActionStats]:
+    """
+    Like action_durations, but every file is scanned by a separate worker process and the results are merged.
+    Actions that start in one file and end in another (across a rotation) are not counted.
+    :param paths: log files
+    :param log_filter: optional LogFilter
+    :param workers: number of worker processes, None for os.cpu_count(), 1 to run in the current process
+    """
+    paths = list(paths)
+    if workers == 1 or len(paths) < 2:
+        results = [action_durations(p, log_filter) for p in paths]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_file_durations, [(p, log_filter) for p in paths]))
+    merged: dict[str, ActionStats] = {}
+    for result in results:
+        for action_type, action in result.items():
+            merged.setdefault(action_type, ActionStats()).merge(action)
+    return merged
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Union, Optional
+
+from pycomfort.replacements import CompiledDictionary, RegexDictionary
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS processed (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    dictionary TEXT NOT NULL
+);
+"""
+
+
+def content_hash(data: bytes) -> str:
+    """BLAKE2b digest of content already in memory, the same as file_hash of a file with this content"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def file_hash(path: Union[Path, str], chunk_size: int = 1 << 20) -> str:
+    """BLAKE2b digest of the file content, read in chunks"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def dictionary_hash(compiled: Union[CompiledDictionary, RegexDictionary]) -> str:
+    """
+    Digest of a compiled dictionary: its keys and values in order, mode, and for regular expressions the flags.
+    Callables are identified by their module and qualified name.
+    """
+    def value(v) -> str:
+        return f"{v.__module__}.{v.__qualname__}" if callable(v) else v
+    regex = isinstance(compiled, RegexDictionary)
+    content = {
+        "items": [[k, value(v)] for k, v in compiled.replacement.items()],
+        "mode": compiled.mode.value,
+        "regex": regex,
+        "flags": compiled.flags if regex else 0,
+    }
+    return hashlib.blake2b(json.dumps(content).encode(), digest_size=16).hexdigest()
+
+
+class ReplaceManifest:
+    """
+    Persistent SQLite manifest of files already processed by a replacement dictionary,
+    keyed by path, size, mtime, content hash and dictionary hash.
+
+    A file whose size and mtime match its record for the same dictionary is skipped without being opened.
+    If only the mtime changed (the file was touched or rewritten with the same content), the content hash is compared
+    before the file is processed again. Records are committed in batches and on close.
+
+    Args:
+        manifest_file: SQLite file to keep the manifest in
+        commit_every: number of records after which they are committed
+    """
+
+    def __init__(self, manifest_file: Union[Path, str], commit_every: int = 1000):
+        self.manifest_file = Path(manifest_file)
+        self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.manifest_file))
+        self.connection.executescript(_SCHEMA)
+        self.commit_every = commit_every
+        self._pending = 0
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+    def __enter__(self) -> "ReplaceManifest":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def is_processed(self, path: Union[Path, str], dictionary: str) -> bool:
+        """
+        Checks if the file was already processed with the dictionary and did not change since then.
+        :param path: file to check
+        :param dictionary: dictionary_hash of the dictionary
+        """
+        key = str(Path(path).resolve())
+        row = self.connection.execute("SELECT size, mtime_ns, hash, dictionary FROM processed WHERE path = ?",
+                                      (key,)).fetchone()
+        if row is None or row[3] != dictionary:
+            return False
+        st = os.stat(key)
+        if st.st_size != row[0]:
+            return False
+        if st.st_mtime_ns == row[1]:
+            return True
+        if file_hash(key) != row[2]:
+            return False
+        self._write("UPDATE processed SET mtime_ns = ? WHERE path = ?", (st.st_mtime_ns, key))
+        return True
+
+    def record(self, path: Union[Path, str], dictionary: str, size: Optional[int] = None,
+               mtime_ns: Optional[int] = None, content: Optional[str] = None):
+        """
+        Remembers the current size, mtime and content hash of a file processed with the dictionary.
+        :param path: processed file
+        :param dictionary: dictionary_hash of the dictionary
+        :param size: size of the file, if size, mtime_ns and content are all given they are stored as they are
+        (path then has to be resolved already) and the file is neither resolved, stat-ed nor read again
+        :param mtime_ns: modification time of the file in nanoseconds
+        :param content: content_hash of the file
+        """
+        if size is None or mtime_ns is None or content is None:
+            key = str(Path(path).resolve())
+            st = os.stat(key)
+            size, mtime_ns, content = st.st_size, st.st_mtime_ns, file_hash(key)
+        else:
+            key = str(path)
+        self._write("INSERT OR REPLACE INTO processed VALUES (?, ?, ?, ?, ?)", (key, size, mtime_ns, content, dictionary))
+
+    def _write(self, query: str, args: tuple):
+        self.connection.execute(query, args)
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.connection.commit()
+            self._pending = 0
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM processed").fetchone()[0]
@@ -0,0 +1,172 @@
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Union, Optional, Callable, Iterable, Iterator
+
+ProgressCallback = Callable[[dict, bool], None]
+
+
+class ProgressSink(ABC):
+    """
+    Base class of progress sinks. A sink is called with a snapshot dictionary (see Progress.snapshot)
+    and whether it is the final report of the operation; it is called at most once every interval seconds
+    (the final report is always delivered). Plain callables with the same signature can be used as sinks too.
+    """
+
+    interval: float = 0.5
+
+    @abstractmethod
+    def __call__(self, snapshot: dict, final: bool):
+        """Reports one snapshot, final is True for the last report of the operation"""
+
+
+def _format_bytes(size: float) -> str:
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+class TerminalProgress(ProgressSink):
+    """
+    Rewrites one status line (with a carriage return) on the terminal, ended with a newline on the final report:
+    entries and rate, bytes read and written with their rates, changed files and CPU use.
+    A CPU use near 100% per thread means the job is CPU-bound, a low one that it waits for I/O.
+
+    Args:
+        stream: Stream to write to, sys.stderr by default
+        interval: Minimal number of seconds between two updates
+    """
+
+    def __init__(self, stream=None, interval: float = 0.2):
+        self.stream = stream
+        self.interval = interval
+
+    def __call__(self, snapshot: dict, final: bool):
+        s = snapshot
+        line = (f"{s['operation']}: {s['entries']} entries ({s['entries_per_s']:.0f}/s), "
+                f"read {_format_bytes(s['bytes_read'])} ({_format_bytes(s['bytes_read_per_s'])}/s), "
+                f"wrote {_format_bytes(s['bytes_written'])} ({_format_bytes(s['bytes_written_per_s'])}/s), "
+                f"changed {s['files_changed']}, cpu {s['cpu_utilization'] * 100:.0f}%, {s['elapsed']:.1f}s")
+        stream = sys.stderr if self.stream is None else self.stream
+        stream.write("\r" + line + ("\n" if final else ""))
+        stream.flush()
+
+
+_global_sinks: list = []
+
+
+def add_progress_sink(sink: Union[ProgressSink, ProgressCallback]):
+    """Attaches a sink to every file operation started without an explicit progress argument"""
+    _global_sinks.append(sink)
+
+
+def remove_progress_sink(sink: Union[ProgressSink, ProgressCallback]):
+    _global_sinks.remove(sink)
+
+
+class Progress:
+    """
+    Thread-safe counters of one long operation reported to sinks with rates per second.
+
+    Operations call add() as they go; sinks are called only when at least the smallest sink interval has passed,
+    so the cost of add() is a lock, a few additions and a clock read.
+
+    Args:
+        operation: Name of the operation shown in the reports
+        sinks: Sinks (ProgressSink instances or callables taking the snapshot and the final flag)
+    """
+
+    def __init__(self, operation: str, sinks: Iterable[Union[ProgressSink, ProgressCallback]]):
+        self.operation = operation
+        self.sinks = list(sinks)
+        self.entries = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.files_changed = 0
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._cpu_started = time.process_time()
+        self._last = [self._started] * len(self.sinks)
+        self._intervals = [getattr(sink, "interval", ProgressSink.interval) for sink in self.sinks]
+        self._next = self._started + min(self._intervals, default=0.0)
+        self._finished = False
+
+    def add(self, entries: int = 0, bytes_read: int = 0, bytes_written: int = 0, files_changed: int = 0):
+        """Adds to the counters and reports to the sinks that are due"""
+        with self._lock:
+            self.entries += entries
+            self.bytes_read += bytes_read
+            self.bytes_written += bytes_written
+            self.files_changed += files_changed
+        now = time.monotonic()
+        if now >= self._next:
+            self._report(now, False)
+
+    def snapshot(self) -> dict:
+        """Counters, elapsed seconds, rates per second and CPU time of the process relative to the elapsed time"""
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        with self._lock:
+            return {
+                "operation": self.operation,
+                "elapsed": elapsed,
+                "entries": self.entries,
+                "bytes_read": self.bytes_read,
+                "bytes_written": self.bytes_written,
+                "files_changed": self.files_changed,
+                "entries_per_s": self.entries / elapsed,
+                "bytes_read_per_s": self.bytes_read / elapsed,
+                "bytes_written_per_s": self.bytes_written / elapsed,
+                "cpu_utilization": (time.process_time() - self._cpu_started) / elapsed,
+            }
+
+    def _report(self, now: float, final: bool):
+        with self._lock:
+            due = [i for i, last in enumerate(self._last) if final or now - last >= self._intervals[i]]
+            for i in due:
+                self._last[i] = now
+            self._next = min((last + interval for last, interval in zip(self._last, self._intervals)),
+                             default=float("inf"))
+        if due:
+            snapshot = self.snapshot()
+            for i in due:
+                self.sinks[i](snapshot, final)
+
+    def finish(self):
+        """Sends the final report to all sinks (only once)"""
+        if not self._finished:
+            self._finished = True
+            self._report(time.monotonic(), True)
+
+    def __enter__(self) -> "Progress":
+        return self
+
+    def __exit__(self, *exc):
+        self.finish()
+
+
+@contextmanager
+def tracking(operation: str,
+             progress: Union[Progress, ProgressSink, ProgressCallback, list, None] = None) -> Iterator[Optional[Progress]]:
+    """
+    Resolves the progress argument of a file operation and sends the final report when the operation ends.
+    :param operation: name of the operation
+    :param progress: a Progress to add to (shared by several calls, finished by its owner), a sink or a list of sinks,
+    or None to use the sinks added with add_progress_sink
+    :return: Progress to report to, or None when there is nothing to report to (the operation then skips all counting)
+    """
+    if isinstance(progress, Progress):
+        yield progress
+        return
+    if progress is None:
+        tracker = Progress(operation, _global_sinks) if _global_sinks else None
+    else:
+        tracker = Progress(operation, progress if isinstance(progress, list) else [progress])
+    try:
+        yield tracker
+    finally:
+        if tracker is not None:
+            tracker.finish()
@@ -0,0 +1,160 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Union, Optional, Iterable
+
+from pycomfort.progress import Progress
+
+
+class RenameConflict(ValueError):
+    """Raised when a rename plan would lose files: two files get the same name or an existing file is overwritten"""
+
+
+class RenamePlan:
+    """
+    Full old -> new mapping of a batch of renames, computed in memory before anything touches the disk.
+
+    Moves are grouped into independent chains. Inside a chain every move frees the name needed by the previous
+    one, so a -> b, b -> c is applied as b -> c, a -> b, and cycles such as a -> b, b -> a go through a temporary name.
+    Chains do not depend on each other and can be applied by several threads.
+
+    Args:
+        mapping: pairs of (old path, new path), pairs where both are the same are ignored
+    """
+
+    def __init__(self, mapping: Iterable[tuple[Path, Path]]):
+        self.mapping: dict[Path, Path] = {}
+        by_target: dict[Path, Path] = {}
+        for old, new in mapping:
+            old, new = Path(old), Path(new)
+            if old == new:
+                continue
+            if old in self.mapping and self.mapping[old] != new:
+                raise RenameConflict(f"{old} is planned to be renamed to both {self.mapping[old]} and {new}")
+            if new in by_target and by_target[new] != old:
+                raise RenameConflict(f"both {by_target[new]} and {old} are planned to be renamed to {new}")
+            self.mapping[old] = new
+            by_target[new] = old
+        for new, old in by_target.items():
+            if new not in self.mapping and os.path.lexists(new):
+                raise RenameConflict(f"renaming {old} to {new} would overwrite an existing file")
+        self.chains = self._order(by_target)
+
+    def _order(self, by_target: dict[Path, Path]) -> list[list[tuple[Path, Path]]]:
+        chains = []
+        done = set()
+        # chains end with a move into a free name, walk them backwards from that end
+        for old, new in self.mapping.items():
+            if new in self.mapping:
+                continue
+            chain = []
+            current = old
+            while current is not None:
+                chain.append((current, self.mapping[current]))
+                done.add(current)
+                current = by_target.get(current)
+            chains.append(chain)
+        # whatever is left forms cycles, break each of them with a temporary name
+        import uuid
+        for start in self.mapping:
+            if start in done:
+                continue
+            temporary = start.with_name(f".{start.name}.{uuid.uuid4().hex[:8]}.renaming")
+            chain = [(start, temporary)]
+            done.add(start)
+            current = by_target[start]
+            while current != start:
+                chain.append((current, self.mapping[current]))
+                done.add(current)
+                current = by_target[current]
+            chain.append((temporary, self.mapping[start]))
+            chains.append(chain)
+        return chains
+
+    def __len__(self) -> int:
+        return len(self.mapping)
+
+    def __repr__(self) -> str:
+        return f"RenamePlan({len(self)} renames in {len(self.chains)} chains)"
+
+    @property
+    def moves(self) -> list[tuple[Path, Path]]:
+        """All filesystem moves in the order they are applied by a single thread, temporary names included"""
+        return [move for chain in self.chains for move in chain]
+
+    def apply(self, dry_run: bool = False, workers: int = 0,
+              journal: Optional[Union[Path, str]] = None, progress: Optional[Progress] = None) -> list[tuple[Path, Path]]:
+        """
+        Applies the plan. If any rename fails, the renames already done are reverted before the error is raised.
+        :param dry_run: only return what would be renamed
+        :param workers: if above 0, independent chains are renamed by this many threads
+        :param journal: optional file where every completed move is appended as a JSON line,
+        rollback_journal can revert them if the process dies half way
+        :param progress: optional pycomfort.progress.Progress, every file moved to its final name counts as changed
+        :return: list of (old path, new path)
+        """
+        if dry_run or not self.mapping:
+            return list(self.mapping.items())
+        completed: list[tuple[Path, Path]] = []
+        lock = threading.Lock()
+        log = open(journal, "a") if journal is not None else None
+        finals = set(self.mapping.values()) if progress is not None else None
+
+        def run(chain: list[tuple[Path, Path]]):
+            for old, new in chain:
+                os.rename(old, new)
+                with lock:
+                    completed.append((old, new))
+                    if log is not None:
+                        log.write(json.dumps({"from": str(old), "to": str(new)}) + "\n")
+                        log.flush()
+                if finals is not None and new in finals:
+                    progress.add(files_changed=1)
+        try:
+            if workers > 0 and len(self.chains) > 1:
+                from concurrent.futures import ThreadPoolExecutor
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    for future in [pool.submit(run, chain) for chain in self.chains]:
+                        future.result()
+            else:
+                for chain in self.chains:
+                    run(chain)
+        except BaseException:
+            _revert(completed)
+            if log is not None:
+                log.write(json.dumps({"rolled_back": len(completed)}) + "\n")
+            raise
+        else:
+            if log is not None:
+                log.write(json.dumps({"committed": len(completed)}) + "\n")
+        finally:
+            if log is not None:
+                log.close()
+        return list(self.mapping.items())
+
+
+def _revert(completed: list[tuple[Path, Path]]):
+    for old, new in reversed(completed):
+        os.rename(new, old)
+
+
+def rollback_journal(journal: Union[Path, str]) -> int:
+    """
+    Reverts the moves of the last batch recorded in a RenamePlan journal,
+    unless it was already rolled back or completed successfully (batches end with a rolled_back or committed record).
+    :param journal: journal file written by RenamePlan.apply
+    :return: number of reverted moves
+    """
+    completed = []
+    with open(journal) as f:
+        for line in f:
+            record = json.loads(line)
+            if "rolled_back" in record or "committed" in record:
+                completed = []
+            else:
+                completed.append((Path(record["from"]), Path(record["to"])))
+    _revert(completed)
+    with open(journal, "a") as f:
+        f.write(json.dumps({"rolled_back": len(completed)}) + "\n")
+    return len(completed)
@@ -0,0 +1,265 @@
+import re
+from collections import Counter
+from enum import Enum
+from functools import lru_cache
+from typing import Union, Iterable, Iterator
+
+
+class ReplaceMode(str, Enum):
+    """How a dictionary of replacements is applied to a text"""
+    SEQUENTIAL = "sequential"  # every key is applied to the result of the previous one (legacy behaviour)
+    SIMULTANEOUS = "simultaneous"  # one pass, leftmost-longest key wins, replaced text is never rescanned
+
+
+_END = ""  # marks a terminal node in the trie, never clashes with a single character
+
+
+def _build_trie(keys) -> dict:
+    root: dict = {}
+    for key in keys:
+        node = root
+        for ch in key:
+            node = node.setdefault(ch, {})
+        node[_END] = True
+    return root
+
+
+def _trie_to_pattern(node: dict) -> str:
+    """
+    Turns a trie into a regular expression where alternatives share their prefixes.
+    Single-child chains are collapsed into literals, so nesting only grows with branching points.
+    Greedy optional groups make the regex engine prefer the longest key at every position.
+    """
+    alternatives = []
+    for ch in sorted(k for k in node if k != _END):
+        literal = ch
+        child = node[ch]
+        while len(child) == 1 and _END not in child:
+            (nxt, child), = child.items()
+            literal += nxt
+        alternatives.append(re.escape(literal) + _trie_to_pattern(child))
+    if not alternatives:
+        return ""
+    body = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+    return "(?:" + body + ")?" if _END in node else body
+
+
+class CompiledDictionary:
+    """
+    Replacement dictionary compiled once and reused for many texts or files.
+
+    In SIMULTANEOUS mode all keys are merged into a trie which is compiled into a single regular expression,
+    so the text is scanned once and the output is built once, no matter how many keys the dictionary has.
+    In SEQUENTIAL mode keys are applied one after another exactly as replace_from_dict_in_file always did.
+
+    Args:
+        replacement: Dictionary mapping old substrings to new substrings
+        mode: ReplaceMode (or its string value) to use
+    """
+
+    def __init__(self, replacement: dict, mode: Union[ReplaceMode, str] = ReplaceMode.SIMULTANEOUS):
+        if "" in replacement:
+            raise ValueError("Empty string can not be used as a replacement key")
+        self.replacement = dict(replacement)
+        self.mode = ReplaceMode(mode)
+        self.longest = max((len(k) for k in self.replacement), default=0)
+        if self.mode == ReplaceMode.SIMULTANEOUS and self.replacement:
+            self.pattern = re.compile(_trie_to_pattern(_build_trie(self.replacement)))
+        else:
+            self.pattern = None
+
+    def __len__(self) -> int:
+        return len(self.replacement)
+
+    def __repr__(self) -> str:
+        return f"CompiledDictionary({len(self)} keys, mode={self.mode.value})"
+
+    def replace(self, text: str) -> str:
+        """Returns the text with all replacements applied"""
+        if not self.replacement:
+            return text
+        if self.pattern is None:
+            for old, new in self.replacement.items():
+                text = text.replace(old, new)  # str.replace returns the same object when nothing matched
+            return text
+        lookup = self.replacement.__getitem__
+        return self.pattern.sub(lambda m: lookup(m.group()), text)
+
+    def replace_with_counts(self, text: str) -> tuple[str, Counter]:
+        """Returns the text with all replacements applied and how many times every key was replaced"""
+        counts: Counter = Counter()
+        if not self.replacement:
+            return text, counts
+        if self.pattern is None:
+            for old, new in self.replacement.items():
+                found = text.count(old)
+                if found:
+                    counts[old] = found
+                    text = text.replace(old, new)
+            return text, counts
+
+        def substitute(m: re.Match) -> str:
+            key = m.group()
+            counts[key] += 1
+            return self.replacement[key]
+        return self.pattern.sub(substitute, text), counts
+
+    def replace_chunks(self, chunks: Iterable[str]) -> Iterator[str]:
+        """
+        Applies the replacements to a text that arrives in chunks, yielding replaced chunks.
+        Only the last len(longest key) - 1 characters are carried over between chunks,
+        so matches crossing chunk boundaries are found while memory stays bounded by the chunk size.
+        Streaming needs SIMULTANEOUS mode because sequential keys may match text produced by earlier keys.
+        """
+        if self.pattern is None and self.replacement:
+            raise ValueError("Streaming replacement requires ReplaceMode.SIMULTANEOUS")
+        if self.pattern is None:
+            yield from chunks
+            return
+        lookup = self.replacement.__getitem__
+        carry = ""
+        for chunk in chunks:
+            buffer = carry + chunk
+            # a match starting before cut can not be extended by the next chunk
+            cut = len(buffer) - self.longest + 1
+            if cut <= 0:
+                carry = buffer
+                continue
+            parts = []
+            position = 0
+            for m in self.pattern.finditer(buffer):
+                if m.start() >= cut:
+                    break
+                parts.append(buffer[position:m.start()])
+                parts.append(lookup(m.group()))
+                position = m.end()
+            if position < cut:
+                parts.append(buffer[position:cut])
+                position = cut
+            carry = buffer[position:]
+            yield "".join(parts)
+        if carry:
+            yield self.replace(carry)
+
+
+_GLOBAL_FLAGS = re.compile(r"^\(\?([aiLmsux]+)\)")
+
+
+def _scoped(pattern: str) -> str:
+    """Turns leading global flags such as (?i) into a scoped group, so the pattern can be a part of an alternation"""
+    m = _GLOBAL_FLAGS.match(pattern)
+    return pattern if m is None else f"(?{m.group(1)}:{pattern[m.end():]})"
+
+
+_GROUP_NAMES = re.compile(r"(?<!\\)\(\?(P<|P=|\()([^\W\d]\w*)")
+
+
+def _prefixed_groups(pattern: str, prefix: str) -> str:
+    """Prefixes the group names of a pattern (definitions, backreferences and conditionals)"""
+    return _GROUP_NAMES.sub(lambda m: f"(?{m.group(1)}{prefix}{m.group(2)}", pattern)
+
+
+class RegexDictionary:
+    """
+    Dictionary of regular expressions and their replacements compiled once and reused for many texts or files.
+
+    A replacement is either a template string (backreferences such as \\1 or \\g<name> refer to the groups of its own
+    pattern) or a callable that gets the re.Match of its own pattern and returns the new text.
+    In SIMULTANEOUS mode all patterns are joined into a single alternation, the text is scanned once and at every
+    position the first pattern of the dictionary that matches wins. Numbered backreferences inside the patterns
+    themselves are not supported in this mode because group numbers shift in the alternation, use named ones;
+    several patterns may use the same group names.
+    In SEQUENTIAL mode patterns are applied one after another, each to the result of the previous one.
+
+    Args:
+        replacement: Dictionary mapping regular expressions to template strings or callables
+        mode: ReplaceMode (or its string value) to use
+        flags: re flags applied to every pattern
+    """
+
+    def __init__(self, replacement: dict, mode: Union[ReplaceMode, str] = ReplaceMode.SIMULTANEOUS, flags: int = 0):
+        self.replacement = dict(replacement)
+        self.mode = ReplaceMode(mode)
+        self.flags = flags
+        self.patterns = [re.compile(p, flags) for p in self.replacement]
+        if self.mode == ReplaceMode.SIMULTANEOUS and self.replacement:
+            try:
+                self.pattern = re.compile("|".join(f"(?P<_{i}>{_scoped(p)})" for i, p in enumerate(self.replacement)), flags)
+            except re.error:
+                # the same group name in several patterns, make the names unique inside the alternation
+                # (templates and callables still see the original names, see _substitute)
+                self.pattern = re.compile("|".join(f"(?P<_{i}>{_prefixed_groups(_scoped(p), f'_{i}_')})"
+                                                   for i, p in enumerate(self.replacement)), flags)
+            # the wrapping group closes last, so lastindex tells which pattern matched
+            self._by_group = {self.pattern.groupindex[f"_{i}"]: i for i in range(len(self.patterns))}
+        else:
+            self.pattern = None
+
+    def __reduce__(self):
+        return RegexDictionary, (self.replacement, self.mode, self.flags)
+
+    def __len__(self) -> int:
+        return len(self.replacement)
+
+    def __repr__(self) -> str:
+        return f"RegexDictionary({len(self)} patterns, mode={self.mode.value})"
+
+    def _substitute(self, m: re.Match, counts: Counter) -> str:
+        i = self._by_group[m.lastindex]
+        pattern = self.patterns[i]
+        counts[pattern.pattern] += 1
+        new = self.replacement[pattern.pattern]
+        if isinstance(new, str) and "\\" not in new:
+            return new
+        # re-run the single pattern so that callables and templates see its own group numbers
+        own = pattern.match(m.string, m.start())
+        return new(own) if callable(new) else own.expand(new)
+
+    def replace(self, text: str) -> str:
+        """Returns the text with all replacements applied"""
+        return self.replace_with_counts(text)[0]
+
+    def replace_with_counts(self, text: str) -> tuple[str, Counter]:
+        """Returns the text with all replacements applied and how many times every pattern matched"""
+        counts: Counter = Counter()
+        if not self.replacement:
+            return text, counts
+        if self.pattern is None:
+            for pattern, new in zip(self.patterns, self.replacement.values()):
+                text, found = pattern.subn(new, text)
+                if found:
+                    counts[pattern.pattern] += found
+            return text, counts
+        return self.pattern.sub(lambda m: self._substitute(m, counts), text), counts
+
+    def replace_chunks(self, chunks: Iterable[str]) -> Iterator[str]:
+        """Streaming is not supported because a regular expression match has no bounded length"""
+        raise ValueError("Streaming replacement is not supported for regular expressions")
+
+
+@lru_cache(maxsize=128)
+def _compile_cached(items: tuple, mode: ReplaceMode, regex: bool, flags: int) -> Union[CompiledDictionary, RegexDictionary]:
+    return RegexDictionary(dict(items), mode, flags) if regex else CompiledDictionary(dict(items), mode)
+
+
+def compile_dictionary(replacement: Union[dict, CompiledDictionary, RegexDictionary],
+                       mode: Union[ReplaceMode, str] = ReplaceMode.SIMULTANEOUS,
+                       regex: bool = False, flags: int = 0) -> Union[CompiledDictionary, RegexDictionary]:
+    """
+    Compiles a replacement dictionary, already compiled dictionaries are returned as they are.
+    Compiled dictionaries are kept in an LRU cache keyed by the dictionary contents,
+    so compiling the same dictionary for every file of a batch costs a single compilation.
+
+    Args:
+        replacement: Dictionary mapping old substrings (or regular expressions) to new ones or a compiled dictionary
+        mode: ReplaceMode used when the dictionary has to be compiled
+        regex: If True, keys are regular expressions and values are templates or callables (see RegexDictionary)
+        flags: re flags for regular expressions
+    """
+    if isinstance(replacement, (CompiledDictionary, RegexDictionary)):
+        return replacement
+    mode = ReplaceMode(mode)
+    try:
+        return _compile_cached(tuple(replacement.items()), mode, regex, flags)
+    except TypeError:  # unhashable values can not be cached
+        return RegexDictionary(replacement, mode, flags) if regex else CompiledDictionary(replacement, mode)
@@ -0,0 +1,152 @@
+import atexit
+import gzip
+import os
+import re
+import shutil
+import threading
+import time
+from datetime import datetime
+from io import TextIOBase
+from pathlib import Path
+from typing import Optional, Union
+
+COMPRESSIONS = {"gzip": ".gz", "zstd": ".zst"}
+# suffix of the rotated segments named by RotatingLogFile._rotate, optionally compressed
+_SEGMENT_SUFFIX = re.compile(r"\.\d{8}-\d{6}-\d{6}-\d{6}(\.gz|\.zst)?")
+
+
+def _compress(source: Path, compression: str) -> Path:
+    target = source.with_name(source.name + COMPRESSIONS[compression])
+    tmp = target.with_name(target.name + ".tmp")
+    with source.open("rb") as src, tmp.open("wb") as raw:
+        if compression == "gzip":
+            with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) as out:
+                shutil.copyfileobj(src, out, 1 << 20)
+        else:
+            import zstandard
+            with zstandard.ZstdCompressor().stream_writer(raw, closefd=False) as out:
+                shutil.copyfileobj(src, out, 1 << 20)
+    os.replace(tmp, target)
+    source.unlink()
+    return target
+
+
+class RotatingLogFile(TextIOBase):
+    """
+    Text file for JSON logs that rotates by size and/or time, compresses rotated segments in the background
+    and keeps only a limited number of them.
+
+    Rotated segments are named <name>.<timestamp>[.gz|.zst] next to the live file, so they sort by age.
+    Size is counted in characters written, which equals bytes for ASCII JSON lines.
+
+    Args:
+        path: Live log file
+        max_bytes: Rotate when the live file grows over this size, None to never rotate by size
+        rotate_interval: Rotate after this many seconds, None to never rotate by time
+        backups: Number of rotated segments to keep, None to keep all
+        compression: None, "gzip" or "zstd" (needs the zstandard package) for rotated segments
+        buffer_size: Write buffer size in bytes passed to open(), -1 for the default
+    """
+
+    def __init__(self, path: Union[Path, str], max_bytes: Optional[int] = None, rotate_interval: Optional[float] = None,
+                 backups: Optional[int] = None, compression: Optional[str] = None, buffer_size: int = -1):
+        super().__init__()
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValueError(f"compression should be one of {list(COMPRESSIONS)} or None, got {compression}")
+        if compression == "zstd":
+            try:
+                import zstandard  # noqa: F401
+            except ImportError:
+                raise ImportError("zstandard is required for zstd compression but it is not installed. "
+                                  "Install it with: pip install zstandard")
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backups = backups
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self._lock = threading.Lock()
+        self._compressing: list[threading.Thread] = []
+        self._rotations = 0
+        self._open()
+        atexit.register(self.close)
+
+    def _open(self):
+        self._file = self.path.open("a", buffering=self.buffer_size)
+        self._size = self.path.stat().st_size
+        self._opened = time.monotonic()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, s: str) -> int:
+        with self._lock:
+            if self._due(len(s)):
+                self._rotate()
+            self._size += len(s)
+            return self._file.write(s)
+
+    def flush(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+
+    def _due(self, incoming: int) -> bool:
+        if self._size == 0:
+            return False
+        if self.max_bytes is not None and self._size + incoming > self.max_bytes:
+            return True
+        return self.rotate_interval is not None and time.monotonic() - self._opened >= self.rotate_interval
+
+    def _rotate(self):
+        self._file.close()
+        self._rotations += 1
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        # the counter keeps names unique and ordered when several rotations happen within the same microsecond
+        rotated = self.path.with_name(f"{self.path.name}.{stamp}-{self._rotations:06d}")
+        os.replace(self.path, rotated)
+        self._open()
+        if self.compression is None:
+            self._prune()
+        else:
+            self._compressing = [t for t in self._compressing if t.is_alive()]
+            worker = threading.Thread(target=self._compress_and_prune, args=(rotated,), daemon=True)
+            self._compressing.append(worker)
+            worker.start()
+
+    def _compress_and_prune(self, rotated: Path):
+        try:
+            _compress(rotated, self.compression)
+        except FileNotFoundError:
+            pass  # already removed by retention
+        self._prune()
+
+    def segments(self) -> list[Path]:
+        """
+        Rotated segments from the oldest to the newest (partly compressed ones are skipped).
+        Only names produced by rotation are matched, so other files next to the log are never pruned
+        """
+        name = self.path.name
+        return sorted(p for p in self.path.parent.iterdir()
+                      if p.name.startswith(name) and _SEGMENT_SUFFIX.fullmatch(p.name, len(name)))
+
+    def _prune(self):
+        if self.backups is None:
+            return
+        segments = self.segments()
+        for old in segments[:max(len(segments) - self.backups, 0)]:
+            try:
+                old.unlink()
+            except FileNotFoundError:
+                pass
+
+    def close(self):
+        """Flushes and closes the live file and waits for background compression to finish"""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+        for worker in self._compressing:
+            worker.join()
+        atexit.unregister(self.close)
+        super().close()
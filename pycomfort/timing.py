@@ -0,0 +1,162 @@
+import atexit
+import threading
+from typing import Optional
+
+_SUB_BITS = 4
+_SUB = 1 << _SUB_BITS  # sub-buckets per power of two, values are kept with ~6% relative precision
+_BUCKETS = _SUB + (64 - _SUB_BITS - 1) * _SUB + _SUB
+
+
+def _bucket(value: int) -> int:
+    if value < _SUB:
+        return max(value, 0)
+    shift = value.bit_length() - _SUB_BITS - 1
+    return _SUB + shift * _SUB + ((value >> shift) - _SUB)
+
+
+def _bucket_value(index: int) -> int:
+    """Middle of the range of values that fall into the bucket"""
+    if index < _SUB:
+        return index
+    shift, sub = divmod(index - _SUB, _SUB)
+    return ((_SUB + sub) << shift) + ((1 << shift) >> 1)
+
+
+class LatencyHistogram:
+    """
+    Fixed-size log-linear (HDR-style) histogram of nanosecond latencies.
+    Every power of two is split into 16 buckets, so memory is constant (under a thousand counters)
+    and percentiles are precise to about 6%.
+    """
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * _BUCKETS
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+
+    def record(self, value_ns: int):
+        self.counts[_bucket(value_ns)] += 1
+        self.count += 1
+        self.total += value_ns
+        if self.min is None or value_ns < self.min:
+            self.min = value_ns
+        if self.max is None or value_ns > self.max:
+            self.max = value_ns
+
+    def merge(self, other: "LatencyHistogram"):
+        """Adds the values recorded by another histogram to this one"""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def percentile(self, q: float) -> Optional[int]:
+        """Approximate value (ns) below which q percent of the recorded values are"""
+        if not self.count:
+            return None
+        rank = max(1, round(self.count * q / 100.0))
+        seen = 0
+        for index, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return min(max(_bucket_value(index), self.min), self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ns": self.total // self.count if self.count else None,
+            "min_ns": self.min,
+            "max_ns": self.max,
+            "p50_ns": self.percentile(50),
+            "p95_ns": self.percentile(95),
+            "p99_ns": self.percentile(99),
+        }
+
+
+class TimingAggregator:
+    """
+    Thread-safe in-memory counters and latency histograms per function.
+
+    Instead of one Eliot message per call, record() only updates a histogram; emit() logs one summary
+    message with count, errors, mean, min, max, p50, p95 and p99 of every function. Summaries can be emitted
+    periodically from a background thread (start) and/or at exit (emit_at_exit).
+
+    Args:
+        max_functions: Maximum number of separately tracked names, further names are merged into "<other>"
+        message_type: Eliot message type of the summaries
+    """
+
+    OTHER = "<other>"
+
+    def __init__(self, max_functions: int = 1000, message_type: str = "pycomfort:timing_summary"):
+        self.max_functions = max_functions
+        self.message_type = message_type
+        self._histograms: dict[str, LatencyHistogram] = {}
+        self._errors: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stop: Optional[threading.Event] = None
+        self._at_exit = False
+
+    def record(self, name: str, value_ns: int, failed: bool = False):
+        """Records one call of the function name that took value_ns nanoseconds"""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                if len(self._histograms) >= self.max_functions:
+                    name = self.OTHER
+                histogram = self._histograms.setdefault(name, LatencyHistogram())
+            histogram.record(value_ns)
+            if failed:
+                self._errors[name] = self._errors.get(name, 0) + 1
+
+    def snapshot(self, reset: bool = False) -> dict[str, dict]:
+        """Returns the summary of every function, optionally starting a new interval"""
+        with self._lock:
+            histograms, errors = self._histograms, self._errors
+            if reset:
+                self._histograms, self._errors = {}, {}
+            result = {}
+            for name, histogram in histograms.items():
+                result[name] = histogram.summary()
+                result[name]["errors"] = errors.get(name, 0)
+            return result
+
+    def emit(self, reset: bool = True) -> dict[str, dict]:
+        """Logs the current summary as one Eliot message (if anything was recorded) and returns it"""
+        summary = self.snapshot(reset)
+        if summary:
+            from eliot import log_message
+            log_message(message_type=self.message_type, functions=summary)
+        return summary
+
+    def start(self, interval: float = 60.0):
+        """Emits a summary every interval seconds from a daemon thread until stop() is called"""
+        self.stop()
+        stop = self._stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                self.emit()
+        threading.Thread(target=run, name="pycomfort-timing", daemon=True).start()
+
+    def stop(self):
+        if self._stop is not None:
+            self._stop.set()
+            self._stop = None
+
+    def emit_at_exit(self):
+        """Emits the remaining summary when the interpreter exits"""
+        if not self._at_exit:
+            self._at_exit = True
+            atexit.register(self.emit)
+
+
+default_aggregator = TimingAggregator()
@@ -0,0 +1,68 @@
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+from pycomfort import afiles
+from pycomfort.files import traverse
+
+
+def make_tree(root: Path) -> None:
+    for folder in [root, root / "a", root / "a" / "b", root / "c"]:
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / "x.md").write_text("DEBUG")
+        (folder / "y.txt").write_text("DEBUG")
+
+
+def test_async_walk_and_replace(tmp_path: Path) -> None:
+    """Async walking yields the same files as traverse and batch replacement processes every file"""
+    make_tree(tmp_path)
+
+    async def main():
+        walked = [f async for f in afiles.walk_files(tmp_path, lambda f: f.suffix == ".md")]
+        assert walked == traverse(tmp_path, lambda f: f.suffix == ".md")
+        assert await afiles.traverse(tmp_path) == traverse(tmp_path)
+        processed = await afiles.replace_in_files(afiles.walk_files(tmp_path, lambda f: f.suffix == ".md"),
+                                                  {"DEBUG": "INFO"}, limit=2)
+        assert processed == walked
+        await afiles.replace_in_file(tmp_path / "y.txt", "DEBUG", "WARNING")
+        renamed = await afiles.rename_files_with_dictionary(tmp_path / "c", {"x.md": "z.md"})
+        assert [new for _, new in renamed] == ["z.md"]
+    asyncio.run(main())
+    assert (tmp_path / "a" / "b" / "x.md").read_text() == "INFO"
+    assert (tmp_path / "a" / "y.txt").read_text() == "DEBUG"
+    assert (tmp_path / "y.txt").read_text() == "WARNING"
+
+
+def test_bounded_map_limit_and_cancellation() -> None:
+    """No more than limit calls run at once, cancellation stops starting new ones and waits for the running ones"""
+    running, peak, started = [0], [0], []
+
+    def work(i: int) -> int:
+        started.append(i)
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        running[0] -= 1
+        return i * 2
+
+    async def main():
+        assert await afiles.bounded_map(work, range(10), limit=3) == [i * 2 for i in range(10)]
+        assert peak[0] <= 3
+        started.clear()
+        task = asyncio.ensure_future(afiles.bounded_map(work, range(100), limit=2))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert running[0] == 0 and len(started) < 100
+        started.clear()
+        finished = []
+        task = asyncio.ensure_future(afiles.bounded_map(lambda i: (time.sleep(0.1), finished.append(i)), range(3), limit=3))
+        await asyncio.sleep(0.03)  # every item is started, the map waits for the last ones
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert sorted(finished) == [0, 1, 2]
+    asyncio.run(main())
@@ -0,0 +1,22 @@
+import importlib.util
+import json
+from pathlib import Path
+
+
+def load_runner():
+    spec = importlib.util.spec_from_file_location("benchmarks_run", Path(__file__).parent.parent / "benchmarks" / "run.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_benchmarks_run_and_compare(tmp_path: Path) -> None:
+    """A tiny benchmark run produces JSON-serializable results for every hot path and can be compared"""
+    runner = load_runner()
+    report = runner.run_benchmarks(tmp_path, depth=1, fanout=2, files_per_dir=3, file_size=5000, messages=5, repeat=2)
+    assert report["parameters"]["files"] == 9
+    assert {"traverse", "tprint", "with_ext", "rename_files_with_dictionary", "replace_in_file",
+            "replace_from_dict_in_file", "rendering_file_destination"} <= set(report["results"])
+    assert report["results"]["rendering_file_destination"]["per_message_us"] > 0
+    report = json.loads(json.dumps(report))
+    assert len(runner.compare(report, report)) == len(report["results"])
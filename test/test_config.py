@@ -0,0 +1,41 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from pycomfort.config import EnvConfig, find_env_file, get_config
+
+
+def test_env_config_typed_and_cached(tmp_path: Path, monkeypatch) -> None:
+    """Values are parsed once, converted to types, and parsed again only when the file changes"""
+    env = tmp_path / ".env"
+    env.write_text("PYCOMFORT_WORKERS=4\nPYCOMFORT_DEBUG=yes\nPYCOMFORT_HOSTS=a, b,c\nPYCOMFORT_RATIO=0.5\n")
+    monkeypatch.delenv("PYCOMFORT_WORKERS", raising=False)
+    config = EnvConfig(env, check_interval=0)
+    assert config.get_int("PYCOMFORT_WORKERS") == 4
+    assert config.get_bool("PYCOMFORT_DEBUG") is True
+    assert config.get_list("PYCOMFORT_HOSTS") == ["a", "b", "c"]
+    assert config.get_float("PYCOMFORT_RATIO") == 0.5
+    assert config.get("PYCOMFORT_MISSING", 7) == 7
+    with pytest.raises(KeyError):
+        config.require("PYCOMFORT_MISSING")
+    values = config._values
+    assert config.get("PYCOMFORT_WORKERS") == "4" and config._values is values
+    env.write_text("PYCOMFORT_WORKERS=16\n")
+    os.utime(env, ns=(0, 10**18))
+    assert config.get_int("PYCOMFORT_WORKERS") == 16
+    monkeypatch.setenv("PYCOMFORT_WORKERS", "2")
+    assert config.get_int("PYCOMFORT_WORKERS") == 2
+    assert EnvConfig(env, override=True).get_int("PYCOMFORT_WORKERS") == 16
+
+
+def test_env_file_discovery(tmp_path: Path, monkeypatch, capsys) -> None:
+    """The env file is found in parent folders and the shared config is silent"""
+    (tmp_path / ".env").write_text("PYCOMFORT_NAME=found\n")
+    nested = tmp_path / "a" / "b"
+    nested.mkdir(parents=True)
+    assert find_env_file(nested) == tmp_path / ".env"
+    monkeypatch.chdir(nested)
+    assert get_config() is get_config()
+    assert get_config().get("PYCOMFORT_NAME") == "found"
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,39 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+HEAVY = ["functional", "eliot", "eliottree", "typer", "dotenv", "deprecated", "loguru"]
+
+MEASURE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(module: str, runs: int = 3) -> tuple[float, list]:
+    """Imports the module in fresh interpreters and returns the best import time and the heavy modules it loaded"""
+    best, loaded = float("inf"), []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", MEASURE.format(module=module, heavy=HEAVY)],
+                             capture_output=True, text=True, check=True).stdout
+        result = json.loads(out)
+        best, loaded = min(best, result["elapsed"]), result["loaded"]
+    return best, loaded
+
+
+@pytest.mark.parametrize("module,allowed", [
+    ("pycomfort", []),
+    ("pycomfort.files", []),
+    ("pycomfort.config", []),
+    ("pycomfort.comfort", ["typer"]),
+])
+def test_import_time(module: str, allowed: list) -> None:
+    """Heavy dependencies are loaded only by the features that need them and imports stay well under 100 ms"""
+    elapsed, loaded = measure_import(module)
+    assert sorted(loaded) == sorted(allowed)
+    assert elapsed < 0.1, f"importing {module} took {elapsed * 1000:.1f} ms"
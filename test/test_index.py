@@ -0,0 +1,30 @@
+import os
+from pathlib import Path
+from pycomfort.index import DirectoryIndex
+
+
+def test_index_queries_and_incremental_refresh(tmp_path: Path) -> None:
+    """The index answers the files.py queries and only re-lists changed directories"""
+    data = tmp_path / "data"
+    (data / "a").mkdir(parents=True)
+    (data / "b" / "c").mkdir(parents=True)
+    (data / "x.txt").write_text("x")
+    (data / "a" / "sample_1.bam").write_text("bam")
+    (data / "b" / "c" / "sample_2.bam").write_text("bam")
+    with DirectoryIndex(data, tmp_path / "index.sqlite") as index:
+        assert index.refresh() == 4
+        assert index.refresh() == 0
+        assert sorted(p.name for p in index.with_ext(".bam")) == ["sample_1.bam", "sample_2.bam"]
+        assert index.glob("sample_*").len() == 2
+        assert index.files().map(lambda p: p.name).to_list() == ["x.txt"]
+        assert index.dirs().len() == 2
+        assert index.stat(data / "x.txt")[0] == 1
+
+        (data / "b" / "c" / "sample_3.bam").write_text("bam")
+        os.utime(data / "b" / "c", ns=(1, 1))  # make sure the mtime changes even on coarse filesystems
+        assert index.refresh() == 1
+        assert index.with_ext(".bam").len() == 3
+
+    with DirectoryIndex(data, tmp_path / "index.sqlite") as reopened:
+        assert reopened.refresh() == 0
+        assert reopened.all_files().len() == 4
@@ -0,0 +1,209 @@
+import io
+import json
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from eliot import start_action, log_message, Logger
+
+from pycomfort.logging import (
+    QueuedRenderingDestination, OverflowPolicy, RenderingFileDestination, TaskAssembler,
+    log_function, set_function_logging, LogLevel
+)
+
+
+def test_queued_destination_writes_batches(tmp_path: Path) -> None:
+    """Messages are written by the background thread and everything is drained on shutdown"""
+    rendered = io.StringIO()
+    destination = QueuedRenderingDestination(tmp_path / "log.json", rendered, flush_interval=0.05)
+    Logger._destinations.add(destination)
+    try:
+        for i in range(20):
+            with start_action(action_type="work", i=i):
+                pass
+        assert destination.flush(timeout=5)
+        lines = (tmp_path / "log.json").read_text().splitlines()
+        assert len(lines) == 40
+        assert all(json.loads(line)["action_type"] == "work" for line in lines)
+        assert "work" in rendered.getvalue()
+    finally:
+        Logger._destinations.remove(destination)
+        destination.shutdown()
+
+
+def test_queued_destination_survives_unserializable_messages(tmp_path: Path) -> None:
+    """A message that can not be serialized becomes a failure line, the writer keeps going"""
+    circular = []
+    circular.append(circular)
+    destination = QueuedRenderingDestination(tmp_path / "log.json", io.StringIO(), flush_interval=0.05)
+    try:
+        destination({"task_uuid": "a", "task_level": [1], "message_type": "bad", "value": circular})
+        destination({"task_uuid": "b", "task_level": [1], "message_type": "good"})
+        assert destination.flush(timeout=5)
+        lines = [json.loads(line) for line in (tmp_path / "log.json").read_text().splitlines()]
+        assert [line["message_type"] for line in lines] == ["pycomfort:serialization_failure", "good"]
+        assert lines[0]["task_uuid"] == "a" and destination.failed == 1
+        assert destination._thread.is_alive()
+    finally:
+        destination.shutdown()
+
+
+def test_queued_destination_overflow_policies(tmp_path: Path) -> None:
+    """DROP and SAMPLE never block the caller when the writer can not keep up"""
+    gate = threading.Event()
+
+    class SlowFile(io.StringIO):
+        def write(self, s):
+            gate.wait()
+            return super().write(s)
+
+    for policy, kept in [(OverflowPolicy.DROP, 0), (OverflowPolicy.SAMPLE, 2)]:
+        gate.clear()
+        out = SlowFile()
+        destination = QueuedRenderingDestination(out, None, batch_size=1, max_queue=1, overflow=policy, sample_rate=5)
+        destination({"n": 0})  # taken by the writer, which then waits on the gate
+        while destination._queue.qsize():
+            pass
+        destination({"n": 1})  # fills the queue
+        released = threading.Timer(0.2, gate.set)
+        released.start()
+        for n in range(2, 12):
+            destination({"n": n})
+        destination.shutdown()
+        assert destination.dropped == 10 - kept
+        assert len(out.getvalue().splitlines()) == 2 + kept
+
+
+def test_task_assembler_emits_whole_tasks() -> None:
+    """A task is emitted once its root action ends, unfinished tasks are evicted when over the cap"""
+    emitted = []
+    assembler = TaskAssembler(emitted.append, max_tasks=1)
+    assembler.add({"task_uuid": "a", "task_level": [1], "action_type": "outer", "action_status": "started"})
+    assembler.add({"task_uuid": "a", "task_level": [2, 1], "action_type": "inner", "action_status": "started"})
+    assembler.add({"task_uuid": "a", "task_level": [2, 2], "action_type": "inner", "action_status": "succeeded"})
+    assert emitted == []
+    assembler.add({"task_uuid": "a", "task_level": [3], "action_type": "outer", "action_status": "succeeded"})
+    assert len(emitted) == 1 and len(emitted[0]) == 4
+    assembler.add({"task_uuid": "b", "task_level": [1], "message_type": "standalone"})
+    assert len(emitted) == 2 and len(assembler) == 0
+    assembler.add({"task_uuid": "c", "task_level": [1], "action_type": "never", "action_status": "started"})
+    assembler.add({"task_uuid": "d", "task_level": [1], "action_type": "never", "action_status": "started"})
+    assert assembler.evicted == 1 and emitted[-1][0]["task_uuid"] == "c"
+    assembler.flush()
+    assert len(assembler) == 0 and emitted[-1][0]["task_uuid"] == "d"
+
+
+def test_rendering_destination_renders_full_tree(tmp_path: Path) -> None:
+    """RenderingFileDestination renders start and end of nested actions as one tree, messages inside included"""
+    rendered = io.StringIO()
+    emitted = []
+    destination = RenderingFileDestination(tmp_path / "log.json", rendered)
+    render = destination.assembler.emit
+    destination.assembler.emit = lambda messages: (emitted.append(messages), render(messages))
+    Logger._destinations.add(destination)
+    try:
+        with start_action(action_type="outer"):
+            log_message(message_type="inside")
+            with start_action(action_type="inner"):
+                pass
+            assert rendered.getvalue() == ""
+        log_message(message_type="standalone")
+    finally:
+        Logger._destinations.remove(destination)
+    text = rendered.getvalue()
+    assert text.count("outer") == 2 and text.count("inner") == 2  # start and end of each action in one tree
+    assert [len(messages) for messages in emitted] == [5, 1]
+
+
+def test_log_function_logs_args_result_and_timing() -> None:
+    """log_function works as decorator and factory, logs arguments, result and sub-second timing"""
+    messages = []
+    Logger._destinations.add(messages.append)
+    try:
+        @log_function
+        def plain(x):
+            return x * 2
+
+        @log_function(include_args=["a"], include_timing=True, log_level=LogLevel.DEBUG)
+        def timed(a, b=1):
+            return a + b
+
+        assert plain(2) == 4
+        assert timed(1) == 2
+    finally:
+        Logger._destinations.remove(messages.append)
+    plain_start, plain_end, timed_start, timed_end = messages
+    assert plain_start["x"] == 2 and plain_end["result"] == 4
+    assert timed_start["a"] == 1 and "b" not in timed_start and timed_start["level"] == "DEBUG"
+    assert timed_end["duration_ns"] > 0 and timed_end["duration"].startswith("00:00:00.")
+    with pytest.raises(ValueError):
+        log_function(include_args=["missing"])(plain)
+
+
+def test_log_function_arguments_do_not_clash_with_eliot_fields() -> None:
+    """Arguments named action_type or level are logged with a prefix and keep the action type and level intact"""
+    messages = []
+    Logger._destinations.add(messages.append)
+    try:
+        @log_function(action_type="clash", log_level=LogLevel.WARNING)
+        def clash(action_type, level=1, **kwargs):
+            return level
+
+        assert clash("mine", level=5, task_uuid="x") == 5
+    finally:
+        Logger._destinations.remove(messages.append)
+    start = messages[0]
+    assert start["action_type"] == "clash" and start["level"] == "WARNING"
+    assert start["arg_action_type"] == "mine" and start["arg_level"] == 5 and start["kwargs"] == {"task_uuid": "x"}
+
+
+def test_log_function_filtering_and_sampling() -> None:
+    """Filtered, disabled and unsampled calls create no Eliot messages"""
+    messages = []
+    Logger._destinations.add(messages.append)
+    try:
+        @log_function(log_level=LogLevel.DEBUG)
+        def debug():
+            return 1
+
+        @log_function(sample_rate=3)
+        def sampled():
+            return 2
+
+        set_function_logging(level=LogLevel.INFO)
+        debug()
+        assert messages == []
+        set_function_logging(enabled=False)
+        sampled()
+        assert messages == []
+        set_function_logging()
+        for _ in range(6):
+            sampled()
+        assert len(messages) == 4  # calls 1 and 4 of 6, start and end each
+    finally:
+        set_function_logging()
+        Logger._destinations.remove(messages.append)
+
+
+def test_log_function_disabled_overhead() -> None:
+    """The disabled path adds at most a couple of microseconds per call"""
+    def bare(x):
+        return x
+
+    decorated = log_function(bare)
+    calls = 100_000
+
+    def per_call(f) -> float:
+        start = time.perf_counter_ns()
+        for i in range(calls):
+            f(i)
+        return (time.perf_counter_ns() - start) / calls
+
+    set_function_logging(enabled=False)
+    try:
+        overhead = min(per_call(decorated) - per_call(bare) for _ in range(3))
+    finally:
+        set_function_logging()
+    assert overhead < 2_000, f"disabled log_function costs {overhead:.0f} ns per call"
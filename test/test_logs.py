@@ -0,0 +1,59 @@
+import gzip
+import json
+from pathlib import Path
+
+from eliot import Logger, start_action
+
+from pycomfort.logs import LogFilter, read_messages, action_durations, parallel_action_durations
+
+
+def _write_log(path: Path, task_count: int) -> list[dict]:
+    messages = []
+    Logger._destinations.add(messages.append)
+    try:
+        for i in range(task_count):
+            with start_action(action_type="load", level="INFO", index=i):
+                with start_action(action_type="parse", level="DEBUG"):
+                    pass
+        try:
+            with start_action(action_type="load", level="INFO", index=-1):
+                raise ValueError("broken")
+        except ValueError:
+            pass
+    finally:
+        Logger._destinations.remove(messages.append)
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "wt") as f:
+        for message in messages:
+            f.write(json.dumps(message) + "\n")
+        f.write("not json\n")
+    return messages
+
+
+def test_read_and_filter_messages(tmp_path: Path) -> None:
+    """Messages are streamed from plain and gzipped logs and filtered by type, level, task and time"""
+    messages = _write_log(tmp_path / "log.json.gz", 3)
+    assert len(list(read_messages(tmp_path / "log.json.gz"))) == len(messages)
+    loads = list(read_messages(tmp_path / "log.json.gz", LogFilter(action_type="load")))
+    assert len(loads) == 8 and all(m["action_type"] == "load" for m in loads)
+    # level is only logged on start messages
+    infos = list(read_messages(tmp_path / "log.json.gz", LogFilter(level="INFO")))
+    assert len(infos) == 4
+    task = messages[0]["task_uuid"]
+    assert all(m["task_uuid"] == task for m in read_messages(tmp_path / "log.json.gz", LogFilter(task_uuid=task)))
+    after = max(m["timestamp"] for m in messages) + 1
+    assert list(read_messages(tmp_path / "log.json.gz", LogFilter(since=after))) == []
+
+
+def test_action_durations(tmp_path: Path) -> None:
+    """Start and end messages are paired per action and durations are merged across files"""
+    _write_log(tmp_path / "a.json", 3)
+    _write_log(tmp_path / "b.json.gz", 5)
+    single = action_durations(tmp_path / "a.json")
+    assert single["load"].histogram.count == 4 and single["load"].failed == 1
+    assert single["parse"].histogram.count == 3
+    merged = parallel_action_durations([tmp_path / "a.json", tmp_path / "b.json.gz"], workers=2)
+    assert merged["load"].histogram.count == 10 and merged["load"].failed == 2
+    assert merged["parse"].summary()["count"] == 8
+    info = parallel_action_durations([tmp_path / "a.json", tmp_path / "b.json.gz"], LogFilter(level="INFO"), workers=1)
+    assert set(info) == {"load"}
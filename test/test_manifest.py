@@ -0,0 +1,61 @@
+import os
+from pathlib import Path
+
+from pycomfort.files import replace_from_dict_in_file, replace_in_tree
+from pycomfort.manifest import ReplaceManifest, dictionary_hash, file_hash
+from pycomfort.replacements import ReplaceMode, compile_dictionary
+
+
+def test_manifest_skips_processed_files(tmp_path: Path) -> None:
+    """Files are skipped while unchanged, touched files are compared by hash, other dictionaries run again"""
+    source = tmp_path / "a.txt"
+    source.write_text("a b")
+    manifest_file = tmp_path / "manifest.sqlite"
+    digest = dictionary_hash(compile_dictionary({"a": "aa"}, ReplaceMode.SEQUENTIAL))
+    with ReplaceManifest(manifest_file) as manifest:
+        assert not manifest.is_processed(source, digest)
+        replace_from_dict_in_file(source, {"a": "aa"}, manifest=manifest)
+        assert source.read_text() == "aa b"
+        replace_from_dict_in_file(source, {"a": "aa"}, manifest=manifest)
+        assert source.read_text() == "aa b"
+        os.utime(source, (1_000_000, 1_000_000))
+        assert manifest.is_processed(source, digest)
+        assert not manifest.is_processed(source, dictionary_hash(compile_dictionary({"a": "b"}, ReplaceMode.SEQUENTIAL)))
+    replace_from_dict_in_file(source, {"a": "aa"}, manifest=manifest_file)
+    assert source.read_text() == "aa b"
+    source.write_text("a a")
+    replace_from_dict_in_file(source, {"a": "aa"}, manifest=manifest_file)
+    assert source.read_text() == "aa aa"
+
+
+def test_unchanged_files_are_not_rewritten(tmp_path: Path) -> None:
+    """Files without matches keep their mtime and repeated tree runs only process new or changed files"""
+    (tmp_path / "a.md").write_text("DEBUG")
+    (tmp_path / "b.md").write_text("nothing")
+    os.utime(tmp_path / "b.md", (1_000_000, 1_000_000))
+    replace_from_dict_in_file(tmp_path / "b.md", {"DEBUG": "INFO"})
+    assert (tmp_path / "b.md").stat().st_mtime == 1_000_000
+    manifest_file = tmp_path / "manifest.sqlite"
+    first = replace_in_tree(tmp_path, {"DEBUG": "INFO"}, exts=[".md"], workers=2, manifest=manifest_file)
+    assert (first.files_skipped, first.files_changed) == (0, 1)
+    (tmp_path / "c.md").write_text("DEBUG")
+    second = replace_in_tree(tmp_path, {"DEBUG": "INFO"}, exts=[".md"], workers=1, manifest=manifest_file)
+    assert (second.files_skipped, second.files_changed) == (2, 1)
+    assert len(ReplaceManifest(manifest_file)) == 3
+
+
+def test_tree_records_hashed_by_workers(tmp_path: Path) -> None:
+    """Records computed in the workers match the size, mtime and content of the files left on disk"""
+    (tmp_path / "a.md").write_text("DEBUG\r\nline")
+    (tmp_path / "b.md").write_text("nothing")
+    manifest_file = tmp_path / "manifest.sqlite"
+    for workers in [1, 2]:
+        replace_in_tree(tmp_path, {"DEBUG": "INFO"}, exts=[".md"], workers=workers, manifest=manifest_file)
+        with ReplaceManifest(manifest_file) as manifest:
+            rows = manifest.connection.execute("SELECT path, size, mtime_ns, hash FROM processed").fetchall()
+        assert len(rows) == 2
+        for path, size, mtime_ns, content in rows:
+            st = os.stat(path)
+            assert (size, mtime_ns, content) == (st.st_size, st.st_mtime_ns, file_hash(path))
+        manifest_file.unlink()
+    assert (tmp_path / "a.md").read_bytes() == b"INFO\r\nline"
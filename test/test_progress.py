@@ -0,0 +1,92 @@
+import io
+from pathlib import Path
+
+import pytest
+from eliot import Logger
+
+from pycomfort import progress
+from pycomfort.files import traverse, replace_in_tree, replace_from_dict_in_file, rename_files_with_dictionary
+from pycomfort.logging import EliotProgress
+from pycomfort.progress import Progress, ProgressSink, TerminalProgress, add_progress_sink, remove_progress_sink
+
+
+def _tree(root: Path) -> Path:
+    (root / "sub").mkdir(parents=True)
+    (root / "a.txt").write_text("foo bar")
+    (root / "b.txt").write_text("nothing here")
+    (root / "sub" / "c.txt").write_text("foo foo")
+    return root
+
+
+def test_progress_counts_file_operations(tmp_path: Path) -> None:
+    """Sinks get the counters of traverse, replace_in_tree, replace_from_dict_in_file and renames with a final report"""
+    root = _tree(tmp_path / "tree")
+    reports = []
+
+    def sink(snapshot: dict, final: bool):
+        reports.append((snapshot, final))
+
+    assert len(traverse(root, progress=sink)) == 4
+    last, final = reports[-1]
+    assert final and last["operation"] == "traverse" and last["entries"] == 4
+
+    reports.clear()
+    summary = replace_in_tree(root, {"foo": "qux"}, workers=1, progress=sink)
+    last, final = reports[-1]
+    assert final and last["entries"] == 3 and last["files_changed"] == summary.files_changed == 2
+    assert last["bytes_read"] == 7 + 12 + 7 and last["bytes_written"] == summary.bytes_rewritten
+    assert {"entries_per_s", "bytes_read_per_s", "bytes_written_per_s", "cpu_utilization"} <= set(last)
+
+    reports.clear()
+    with Progress("batch", [sink]) as shared:
+        replace_from_dict_in_file(root / "a.txt", {"qux": "foo"}, progress=shared)
+        replace_from_dict_in_file(root / "b.txt", {"qux": "foo"}, progress=shared)
+        assert reports == []
+    last, final = reports[-1]
+    assert len(reports) == 1 and last["entries"] == 2 and last["files_changed"] == 1 and last["bytes_read"] == 19
+
+    reports.clear()
+    for dictionary in [{"missing": "x"}, {"foo": "qux"}]:
+        replace_from_dict_in_file(root / "a.txt", dictionary, mode="simultaneous", chunk_size=2, progress=sink)
+    assert [report["files_changed"] for report, final in reports if final] == [0, 1]
+
+    reports.clear()
+    rename_files_with_dictionary(root, {"a.": "renamed_a."}, progress=sink)
+    last, final = reports[-1]
+    assert last["operation"] == "rename" and last["entries"] == 2 and last["files_changed"] == 1
+    assert (root / "renamed_a.txt").exists()
+
+
+def test_progress_sinks(tmp_path: Path) -> None:
+    """Terminal and Eliot sinks render the reports, global sinks are used without a progress argument"""
+    root = _tree(tmp_path / "tree")
+    with pytest.raises(TypeError):
+        ProgressSink()
+    stream = io.StringIO()
+    traverse(root, progress=TerminalProgress(stream=stream))
+    assert stream.getvalue().startswith("\rtraverse: 4 entries") and stream.getvalue().endswith("\n")
+
+    messages = []
+    Logger._destinations.add(messages.append)
+    eliot_sink = EliotProgress()
+    add_progress_sink(eliot_sink)
+    try:
+        replace_in_tree(root, {"foo": "qux"}, workers=1)
+    finally:
+        remove_progress_sink(eliot_sink)
+        Logger._destinations.remove(messages.append)
+    reports = [m for m in messages if m.get("message_type") == "pycomfort:progress"]
+    assert reports[-1]["final"] and reports[-1]["operation"] == "replace_in_tree" and reports[-1]["files_changed"] == 2
+
+
+def test_no_progress_without_sinks(tmp_path: Path, monkeypatch) -> None:
+    """Without a progress argument or global sinks no Progress is created"""
+    root = _tree(tmp_path / "tree")
+
+    class Failing(Progress):
+        def __init__(self, *args, **kwargs):
+            raise AssertionError("Progress created without sinks")
+    monkeypatch.setattr(progress, "Progress", Failing)
+    assert len(traverse(root)) == 4
+    replace_in_tree(root, {"foo": "qux"}, workers=1)
+    rename_files_with_dictionary(root, {"b.": "c."})
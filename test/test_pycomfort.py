@@ -1,3 +1,6 @@
+import inspect
+import os
+import sys
 from pprint import pprint
 import pytest
 from pathlib import Path
@@ -7,7 +10,13 @@ from pycomfort.files import (
     dirs, 
     files, 
     with_ext,
-    rename_files_with_dictionary
+    rename_files_with_dictionary,
+    traverse,
+    walk,
+    classify_tree,
+    normalized_ext,
+    iter_files,
+    tprint
 )
 
 @pytest.fixture
@@ -82,4 +91,112 @@ def test_rename_files_with_dictionary(temp_directory: Path) -> None:
     assert "new1.txt" in new_files
     assert "new2.txt" in new_files
     assert "test1.txt" not in new_files
-    assert "test2.txt" not in new_files
\ No newline at end of file
+    assert "test2.txt" not in new_files
+
+def test_traverse(temp_directory: Path) -> None:
+    """Test the traverse() function keeps files-then-folders order, depth limits and nesting"""
+    everything = traverse(temp_directory)
+    assert len(everything) == 7
+    assert [p.name for p in everything[:3]] == [p.name for p in files(temp_directory)]
+    assert len(traverse(temp_directory, max_depth=0)) == 5
+    py_files = traverse(temp_directory, fun=lambda p: p.suffix == ".py")
+    assert sorted(p.name for p in py_files) == ["subfile2.py", "test.py"]
+    nested = traverse(temp_directory, flatten=False)
+    assert len(nested) == 7 and all(isinstance(n, list) and len(n) == 1 for n in nested[5:])
+
+def test_walk_prune_symlinks_and_depth(temp_directory: Path) -> None:
+    """Test walk() pruning, symlink-loop protection and trees deeper than the recursion limit"""
+    pruned = list(walk(temp_directory, prune=lambda d: d.name == "subdir1"))
+    assert "subfile1.txt" not in [p.name for p in pruned]
+    (temp_directory / "subdir2" / "loop").symlink_to(temp_directory)
+    assert len(list(walk(temp_directory))) == 8
+    assert len(list(walk(temp_directory, follow_symlinks=False))) == 7
+    (temp_directory / "alias").symlink_to(temp_directory / "subdir1")
+    assert len(list(walk(temp_directory))) == 9
+    assert len(list(walk(temp_directory, workers=2))) == 9
+    import io
+    out = io.StringIO()
+    tprint(temp_directory, with_sizes=True, file=out)
+    assert out.getvalue().count("subfile1.txt") == 1
+    (temp_directory / "alias").unlink()
+    deep = temp_directory / "deep"
+    os.makedirs(deep.joinpath(*["d"] * 300))
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(len(inspect.stack()) + 100)
+    try:
+        assert len(list(walk(deep))) == 300
+    finally:
+        sys.setrecursionlimit(limit)
+
+def test_traverse_with_workers(temp_directory: Path) -> None:
+    """Test concurrent listing gives the sequential order when ordered and the same entries when not"""
+    for i in range(5):
+        (temp_directory / "subdir1" / f"nested{i}").mkdir()
+        (temp_directory / "subdir1" / f"nested{i}" / "file.txt").write_text("x")
+    sequential = traverse(temp_directory)
+    assert traverse(temp_directory, workers=4) == sequential
+    assert traverse(temp_directory, workers=4, flatten=False) == traverse(temp_directory, flatten=False)
+    assert sorted(walk(temp_directory, workers=4, ordered=False)) == sorted(sequential)
+
+def test_ordered_workers_bound_pending_listings(tmp_path: Path, monkeypatch) -> None:
+    """Test ordered concurrent listing submits only a few listings ahead of the consumer in a wide tree"""
+    from pycomfort import files as files_module
+    for i in range(50):
+        (tmp_path / f"wide{i:02d}").mkdir()
+    listed = []
+    list_dir = files_module._list_dir
+
+    def counting(path, *args):
+        listed.append(path)
+        return list_dir(path, *args)
+    monkeypatch.setattr(files_module, "_list_dir", counting)
+    scanned = files_module.scan(tmp_path, workers=1)
+    assert next(scanned).path == tmp_path
+    assert next(scanned).path.parent == tmp_path
+    assert len(listed) <= 2 + 4
+    assert len(list(scanned)) == 49 and len(listed) == 51
+
+def test_classify_tree(temp_directory: Path) -> None:
+    """Test classify_tree() buckets files of the whole tree by normalized multi-part extension"""
+    (temp_directory / "subdir1" / "reads.FASTQ.gz").write_text("@r1")
+    (temp_directory / "subdir2" / "archive.tar.gz").write_text("tar")
+    assert normalized_ext("reads.R1.fastq.gz") == ".fastq.gz"
+    assert normalized_ext(Path("README")) == ""
+    buckets = classify_tree(temp_directory)
+    assert sorted(buckets) == [".fastq.gz", ".py", ".tar.gz", ".txt"]
+    assert len(buckets[".txt"]) == 3
+    sized = classify_tree(temp_directory, exts=["fastq.gz", ".t"], with_size=True)
+    assert list(sized) == [".fastq.gz"]
+    assert sized[".fastq.gz"][0][1] == 3
+
+def test_lazy_helpers(temp_directory: Path) -> None:
+    """Test lazy sequences give the same results as eager ones and stop listing early"""
+    assert sorted(children(temp_directory, lazy=True)) == sorted(children(temp_directory))
+    assert sorted(dirs(temp_directory, lazy=True)) == sorted(dirs(temp_directory))
+    assert sorted(with_ext(temp_directory, ".txt", lazy=True)) == sorted(with_ext(temp_directory, ".txt"))
+    first = files(temp_directory, lazy=True).take(1).to_list()
+    assert len(first) == 1 and first[0].is_file()
+    assert sorted(iter_files(temp_directory)) == sorted(files(temp_directory))
+
+def test_tprint_limits_and_sizes(temp_directory: Path) -> None:
+    """Test tprint keeps its layout, summarizes hidden entries and aggregates sizes in the same walk"""
+    import io
+    out = io.StringIO()
+    tprint(temp_directory, file=out)
+    lines = out.getvalue().splitlines()
+    assert lines[0] == temp_directory.name
+    assert sorted(lines[1:4]) == ["\ttest.py", "\ttest1.txt", "\ttest2.txt"]
+    assert len(lines) == 8
+    out = io.StringIO()
+    tprint(temp_directory, max_entries_per_dir=1, file=out)
+    lines = out.getvalue().splitlines()
+    assert "\t... 2 more files" in lines and "\t... 1 more folders" in lines
+    out = io.StringIO()
+    tprint(temp_directory, max_depth=0, with_sizes=True, file=out)
+    assert out.getvalue().splitlines()[-1] == "\t= 5 files, 2 folders, 49 B"
+    out = io.StringIO()
+    tprint(temp_directory, max_entries=2, with_sizes=True, file=out)
+    assert out.getvalue().splitlines()[-2:] == ["... output stopped after 2 entries", "\t= 5 files, 2 folders, 49 B"]
+    out = io.StringIO()
+    tprint(temp_directory, max_entries=2, file=out)
+    assert out.getvalue().splitlines()[-1] == "... output stopped after 2 entries"
@@ -0,0 +1,49 @@
+import pytest
+from pathlib import Path
+from pycomfort.files import rename_files_with_dictionary
+from pycomfort.renames import RenamePlan, RenameConflict, rollback_journal
+
+
+def test_plan_handles_chains_and_cycles(tmp_path: Path) -> None:
+    """Renames that depend on each other are ordered and swaps go through a temporary name"""
+    for name in ["a", "b", "c", "d"]:
+        (tmp_path / name).write_text(name)
+    plan = RenamePlan([(tmp_path / "a", tmp_path / "b"), (tmp_path / "b", tmp_path / "e"),
+                       (tmp_path / "c", tmp_path / "d"), (tmp_path / "d", tmp_path / "c")])
+    assert len(plan.chains) == 2
+    assert plan.apply(dry_run=True) == list(plan.mapping.items())
+    assert (tmp_path / "a").exists()
+    plan.apply(workers=2)
+    assert {p.name: p.read_text() for p in tmp_path.iterdir()} == {"b": "a", "e": "b", "c": "d", "d": "c"}
+
+
+def test_plan_detects_collisions(tmp_path: Path) -> None:
+    """Two files with the same new name or overwriting an untouched file are refused before any rename"""
+    (tmp_path / "x1").write_text("1")
+    (tmp_path / "x2").write_text("2")
+    (tmp_path / "y").write_text("y")
+    with pytest.raises(RenameConflict):
+        RenamePlan([(tmp_path / "x1", tmp_path / "z"), (tmp_path / "x2", tmp_path / "z")])
+    with pytest.raises(RenameConflict):
+        RenamePlan([(tmp_path / "x1", tmp_path / "y")])
+
+
+def test_failed_batch_is_rolled_back(tmp_path: Path) -> None:
+    """A failure in the middle reverts completed renames, the journal reverts only an interrupted batch"""
+    (tmp_path / "one").write_text("1")
+    plan = RenamePlan([(tmp_path / "one", tmp_path / "uno"), (tmp_path / "missing", tmp_path / "absent")])
+    with pytest.raises(FileNotFoundError):
+        plan.apply()
+    assert (tmp_path / "one").exists() and not (tmp_path / "uno").exists()
+
+    journal = tmp_path / "journal.jsonl"
+    renamed = rename_files_with_dictionary(tmp_path, {"one": "two", "t": "T"}, journal=journal)
+    assert renamed == [("one", "Two")]
+    rename_files_with_dictionary(tmp_path, {"Two": "three"}, journal=journal)
+    assert rollback_journal(journal) == 0
+    assert (tmp_path / "three").exists()
+    # a process that died half way through its batch leaves no committed record
+    lines = journal.read_text().splitlines()
+    journal.write_text("\n".join(lines[:3]) + "\n")
+    assert rollback_journal(journal) == 1
+    assert (tmp_path / "Two").exists() and not (tmp_path / "three").exists()
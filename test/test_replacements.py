@@ -0,0 +1,160 @@
+import os
+import pytest
+from pathlib import Path
+from pycomfort.files import replace_from_dict_in_file, replace_in_file, replace_in_tree, replace_with_counts_in_file
+from pycomfort.replacements import CompiledDictionary, RegexDictionary, ReplaceMode, compile_dictionary
+
+
+def test_simultaneous_prefers_longest_key() -> None:
+    """Overlapping keys are resolved leftmost-longest and replaced text is never rescanned"""
+    compiled = CompiledDictionary({"ab": "X", "abc": "Y", "b": "ab", "c": "Z"})
+    assert compiled.replace("abcabxbc") == "YXxabZ"
+    text, counts = compiled.replace_with_counts("abcabxbc")
+    assert text == "YXxabZ"
+    assert counts == {"abc": 1, "ab": 1, "b": 1, "c": 1}
+
+
+def test_sequential_matches_legacy_loop() -> None:
+    """SEQUENTIAL mode reproduces str.replace applied key by key"""
+    dictionary = {"a": "b", "b": "c"}
+    compiled = CompiledDictionary(dictionary, ReplaceMode.SEQUENTIAL)
+    assert compiled.replace("ab") == "cc"
+    assert CompiledDictionary(dictionary, ReplaceMode.SIMULTANEOUS).replace("ab") == "bc"
+    with pytest.raises(ValueError):
+        CompiledDictionary({"": "x"})
+
+
+def test_replace_from_dict_in_file_modes(tmp_path: Path) -> None:
+    """Both modes are available from replace_from_dict_in_file and a compiled dictionary can be reused"""
+    source = tmp_path / "source.txt"
+    source.write_text("DEBUG WARNING ERROR")
+    compiled = CompiledDictionary({"DEBUG": "INFO", "WARNING": "WARN"})
+    out = replace_from_dict_in_file(source, compiled, tmp_path / "out.txt")
+    assert out.read_text() == "INFO WARN ERROR"
+    replace_from_dict_in_file(source, {"ERROR": "ERR"}, mode="simultaneous")
+    assert source.read_text() == "DEBUG WARNING ERR"
+
+
+def test_streaming_finds_matches_across_chunks(tmp_path: Path) -> None:
+    """Chunked replacement gives the same result as the whole-file one, whatever the chunk size"""
+    text = "xxabcdxab\r\nabcabcd" * 50
+    dictionary = {"ab": "1", "abcd": "2", "d": "3"}
+    expected = CompiledDictionary(dictionary).replace(text)
+    source = tmp_path / "source.txt"
+    source.write_bytes(text.encode())
+    for chunk_size in [1, 2, 3, 5, 64, 10_000]:
+        out = replace_from_dict_in_file(source, dictionary, tmp_path / "out.txt",
+                                        mode=ReplaceMode.SIMULTANEOUS, chunk_size=chunk_size)
+        assert out.read_bytes().decode() == expected
+    replace_in_file(source, "abcd", "-", chunk_size=4)
+    assert source.read_bytes().decode() == text.replace("abcd", "-")
+    assert [p.name for p in tmp_path.iterdir() if p.name.endswith(".tmp")] == []
+    os.utime(source, ns=(0, 0))
+    for chunk_size in [1, 3, 64]:
+        replace_from_dict_in_file(source, {"missing": "x", "-": "-"}, mode=ReplaceMode.SIMULTANEOUS, chunk_size=chunk_size)
+    assert source.stat().st_mtime_ns == 0 and source.read_bytes().decode() == text.replace("abcd", "-")
+    assert [p.name for p in tmp_path.iterdir() if p.name.endswith(".tmp")] == []
+    replace_in_file(source, "-", "+")
+    assert source.read_text() == text.replace("abcd", "+").replace("\r\n", "\n")
+    with pytest.raises(ValueError):
+        replace_from_dict_in_file(source, dictionary, chunk_size=16)
+
+
+def test_binary_replace_in_file(tmp_path: Path) -> None:
+    """Memory-mapped replacement keeps bytes and line endings and does not touch files without matches"""
+    source = tmp_path / "source.txt"
+    text = "héllo\r\nworld héllo" * 100
+    source.write_bytes(text.encode())
+    replace_in_file(source, "héllo", "bye", tmp_path / "out.txt", binary=True)
+    assert (tmp_path / "out.txt").read_bytes() == text.replace("héllo", "bye").encode()
+    os.utime(source, (1_000_000, 1_000_000))
+    assert replace_in_file(source, "missing", "x", binary=True) == source
+    assert source.stat().st_mtime == 1_000_000
+    replace_in_file(source, "world", "", binary=True)
+    assert source.read_bytes() == text.replace("world", "").encode()
+    empty = tmp_path / "empty.txt"
+    empty.touch()
+    assert replace_in_file(empty, "a", "b", tmp_path / "empty_out.txt", binary=True).read_bytes() == b""
+    assert [p.name for p in tmp_path.iterdir() if p.name.endswith(".tmp")] == []
+
+
+def test_regex_dictionary() -> None:
+    """Patterns are combined into one alternation, templates and callables see their own groups"""
+    dictionary = {r"(\d+)-(\d+)": r"\2-\1", r"[a-z]+@(\w+)": lambda m: m.group(1).upper(), "foo": "bar"}
+    compiled = RegexDictionary(dictionary)
+    text, counts = compiled.replace_with_counts("1-2 foo me@home 30-40 foo")
+    assert text == "2-1 bar HOME 40-30 bar"
+    assert counts == {r"(\d+)-(\d+)": 2, r"[a-z]+@(\w+)": 1, "foo": 2}
+    sequential = RegexDictionary({"a": "b", "b": "c"}, ReplaceMode.SEQUENTIAL)
+    assert sequential.replace("ab") == "cc"
+    assert RegexDictionary({"a": "b", "b": "c"}).replace("ab") == "bc"
+    assert compile_dictionary({"x+": "y"}, regex=True) is compile_dictionary({"x+": "y"}, regex=True)
+    assert compile_dictionary({"x+": "y"}, regex=True) is not compile_dictionary({"x+": "y"})
+    with pytest.raises(ValueError):
+        compiled.replace_chunks(["a"])
+    units = RegexDictionary({r"(?P<v>\d+)px": r"\g<v>PX", r"(?P<v>\d+)pt": lambda m: m.group("v") + "PT",
+                             r"(?P<c>[ab])(?P=c)": "double"})
+    assert units.replace("10px 3pt aa ab") == "10PX 3PT double ab"
+
+
+def test_regex_replace_in_files(tmp_path: Path) -> None:
+    """Regular expressions work for single files, counted replacements and whole trees"""
+    source = tmp_path / "a.txt"
+    source.write_text("version = 1.2.3\nname = x")
+    replace_in_file(source, r"(\d+)\.(\d+)\.(\d+)", r"\1.\2.4", regex=True)
+    assert source.read_text() == "version = 1.2.4\nname = x"
+    _, counts = replace_with_counts_in_file(source, {r"\d": "#", "name": "title"}, regex=True)
+    assert counts == {r"\d": 3, "name": 1}
+    assert source.read_text() == "version = #.#.#\ntitle = x"
+    (tmp_path / "b.txt").write_text("NAME")
+    summary = replace_in_tree(tmp_path, {"(?i)name|title": "n", "x": "y"}, workers=2, regex=True,
+                              mode=ReplaceMode.SIMULTANEOUS)
+    assert summary.files_changed == 2
+    assert (tmp_path / "b.txt").read_text() == "n"
+
+
+def test_replace_in_tree(tmp_path: Path) -> None:
+    """Only matching files are processed and only files with matches are rewritten"""
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "a.md").write_text("DEBUG here")
+    (tmp_path / "sub" / "b.md").write_text("nothing")
+    (tmp_path / "sub" / "c.txt").write_text("DEBUG too")
+    for workers in [1, 2]:
+        summary = replace_in_tree(tmp_path, {"DEBUG": "INFO"}, globs=["*.md"], workers=workers)
+        assert summary.files_scanned == 2
+    assert (tmp_path / "a.md").read_text() == "INFO here"
+    assert (tmp_path / "sub" / "c.txt").read_text() == "DEBUG too"
+    (tmp_path / "a.md").write_text("DEBUG here")
+    summary = replace_in_tree(tmp_path, {"DEBUG": "INFO"}, exts=[".md", ".txt"], workers=2)
+    assert summary.files_scanned == 3
+    assert summary.files_changed == 2
+    assert summary.bytes_rewritten == len("INFO here") + len("INFO too")
+    (tmp_path / "reads.FASTQ.gz").write_text("DEBUG")
+    assert replace_in_tree(tmp_path, {"DEBUG": "INFO"}, exts=[".t"]).files_scanned == 0
+    assert replace_in_tree(tmp_path, {"DEBUG": "INFO"}, exts=[".fastq.gz"]).files_changed == 1
+    assert replace_in_tree(tmp_path, {"DEBUG": "INFO"}, exts=[".gz"]).files_scanned == 1
+
+
+def test_replace_in_tree_skips_unreadable_files(tmp_path: Path) -> None:
+    """Binary files are counted as failed and the other files are still processed"""
+    (tmp_path / "img.png").write_bytes(bytes(range(256)) * 4)
+    (tmp_path / "a.txt").write_text("DEBUG")
+    (tmp_path / "b.txt").write_text("DEBUG")
+    for workers in [1, 2]:
+        summary = replace_in_tree(tmp_path, {"DEBUG": "INFO"}, workers=workers)
+        assert summary.files_failed == 1 and summary.failed[0][0] == tmp_path / "img.png"
+    assert (tmp_path / "a.txt").read_text() == "INFO" and (tmp_path / "b.txt").read_text() == "INFO"
+    assert "failed 1" in str(summary)
+
+
+def test_concurrent_in_process_tree_replacements(tmp_path: Path) -> None:
+    """In-process runs in several threads use their own dictionaries"""
+    from concurrent.futures import ThreadPoolExecutor
+    for i in range(8):
+        folder = tmp_path / str(i)
+        folder.mkdir()
+        for j in range(20):
+            (folder / f"{j}.txt").write_text("x")
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda i: replace_in_tree(tmp_path / str(i), {"x": str(i)}, workers=1), range(8)))
+    assert all(f.read_text() == f.parent.name for f in tmp_path.rglob("*.txt"))
@@ -0,0 +1,64 @@
+import gzip
+import json
+from pathlib import Path
+
+from eliot import Logger, start_action
+
+from pycomfort.logging import to_nice_file
+from pycomfort.rotation import RotatingLogFile
+
+
+def test_rotation_compression_and_retention(tmp_path: Path) -> None:
+    """The live file rotates by size, rotated segments are gzipped and only the newest backups are kept"""
+    log = RotatingLogFile(tmp_path / "log.json", max_bytes=100, backups=2, compression="gzip", buffer_size=1 << 16)
+    lines = [json.dumps({"n": i, "pad": "x" * 20}) + "\n" for i in range(30)]
+    for line in lines:
+        log.write(line)
+    log.close()
+    segments = log.segments()
+    assert len(segments) == 2
+    assert all(p.name.endswith(".gz") for p in segments)
+    kept = [line for p in segments for line in gzip.open(p, "rt")] + (tmp_path / "log.json").read_text().splitlines(True)
+    assert kept == lines[-len(kept):]
+    assert (tmp_path / "log.json").stat().st_size <= 100
+
+
+def test_pruning_keeps_unrelated_files(tmp_path: Path) -> None:
+    """Files that only share the prefix of the log name are not segments and survive retention"""
+    unrelated = ["log.json.0-notes", "log.json.1", "log.json.lock", "log.json.txt", "log.json.20240101-000000-000000-000001.tmp"]
+    for name in unrelated:
+        (tmp_path / name).write_text("keep")
+    log = RotatingLogFile(tmp_path / "log.json", max_bytes=10, backups=1)
+    for i in range(5):
+        log.write(f"line {i}\n")
+    log.close()
+    assert len(log.segments()) == 1
+    assert all((tmp_path / name).exists() for name in unrelated)
+
+
+def test_to_nice_file_rotates_json_log(tmp_path: Path) -> None:
+    """to_nice_file passes the rotation options to the JSON stream"""
+    destination = to_nice_file(tmp_path / "log.json", tmp_path / "rendered.txt", max_bytes=2000, backups=10)
+    try:
+        for i in range(20):
+            with start_action(action_type="step", i=i):
+                pass
+    finally:
+        Logger._destinations.remove(destination)
+        destination.file.close()
+    assert len(destination.file.segments()) >= 2
+    written = [json.loads(line) for p in destination.file.segments() + [tmp_path / "log.json"] for line in p.open()]
+    assert len(written) == 40
+
+
+def test_to_nice_file_buffers_json_log(tmp_path: Path) -> None:
+    """With a positive buffer_size the JSON log is not flushed after every message"""
+    destination = to_nice_file(tmp_path / "log.json", tmp_path / "rendered.txt", buffer_size=1 << 16)
+    try:
+        with start_action(action_type="step"):
+            pass
+        assert (tmp_path / "log.json").stat().st_size == 0
+    finally:
+        Logger._destinations.remove(destination)
+        destination.file.close()
+    assert len((tmp_path / "log.json").read_text().splitlines()) == 2
@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+from eliot import Logger
+
+from pycomfort.logging import log_function
+from pycomfort.timing import LatencyHistogram, TimingAggregator
+
+
+def test_histogram_percentiles() -> None:
+    """Percentiles of a fixed-size histogram stay within its relative precision"""
+    histogram = LatencyHistogram()
+    for value in range(1, 10_001):
+        histogram.record(value * 1000)
+    summary = histogram.summary()
+    assert summary["count"] == 10_000
+    assert summary["min_ns"] == 1000 and summary["max_ns"] == 10_000_000
+    assert summary["p50_ns"] == pytest.approx(5_000_000, rel=0.07)
+    assert summary["p99_ns"] == pytest.approx(9_900_000, rel=0.07)
+    assert len(histogram.counts) < 1000
+
+
+def test_aggregator_is_thread_safe_and_bounded() -> None:
+    """Calls from many threads are all counted and the number of tracked names is capped"""
+    aggregator = TimingAggregator(max_functions=2)
+
+    def work():
+        for i in range(1000):
+            aggregator.record("f", i)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    aggregator.record("g", 5, failed=True)
+    aggregator.record("h", 5)
+    snapshot = aggregator.snapshot(reset=True)
+    assert snapshot["f"]["count"] == 4000
+    assert snapshot["g"]["errors"] == 1
+    assert set(snapshot) == {"f", "g", TimingAggregator.OTHER}
+    assert aggregator.snapshot() == {}
+
+
+def test_log_function_aggregate_emits_one_summary() -> None:
+    """With aggregate the decorator logs nothing per call and emit() logs a single summary message"""
+    aggregator = TimingAggregator()
+    messages = []
+
+    @log_function(aggregate=aggregator, action_type="hot")
+    def hot(x):
+        return x + 1
+
+    Logger._destinations.add(messages.append)
+    try:
+        for i in range(100):
+            hot(i)
+        assert messages == []
+        summary = aggregator.emit()
+    finally:
+        Logger._destinations.remove(messages.append)
+    assert summary["hot"]["count"] == 100
+    assert len(messages) == 1 and messages[0]["functions"]["hot"]["p95_ns"] > 0